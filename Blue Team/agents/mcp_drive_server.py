@@ -16,13 +16,17 @@ Security Controls (MAESTRO Compliance - Section 3.5):
 
 Run as: python3 -m agents.mcp_drive_server
 """
+import io
 import os
 import re
+import sys
+import mmap
 import hashlib
+import functools
 import mimetypes
 import logging
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, BinaryIO
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -35,16 +39,73 @@ ALLOWED_FILE_TYPES = {
     "text/markdown": ".md",
 }
 MAX_FILE_SIZE_MB = 5  # Maximum file size for uploads
+FILE_ID_LENGTH = 12  # File IDs are the first 12 hex chars of the content SHA-256
+HASH_CHUNK_SIZE = 1024 * 1024  # 1 MiB reads when hashlib.file_digest is unavailable
+
+# Malware signature stub, matched with plain bytes containment
+MALWARE_SIGNATURES = (b"malware_signature",)
+
+DIRECT_WRITE_MIN_BYTES = 1024 * 1024  # Uploads this large bypass the page cache
+DIRECT_IO_ALIGN = 4096  # O_DIRECT buffer, offset and length alignment
+
+SEARCH_EXCERPT_CHARS = 200  # Length of the excerpt returned with each search hit
+# Bytes read for an excerpt: enough for SEARCH_EXCERPT_CHARS + 1 characters
+# of UTF-8 (at most 4 bytes each), so the excerpt never ends mid-character
+_EXCERPT_WINDOW_BYTES = 4 * (SEARCH_EXCERPT_CHARS + 1)
+SEARCH_BUFFER_BYTES = 64 * 1024  # Files up to this size are read, larger ones mmap'd
+
+# Extensions of files upload_file can store; search_files skips anything else
+_ALLOWED_EXTENSIONS = tuple(ALLOWED_FILE_TYPES.values())
+
+# Characters replaced with underscores in uploaded filenames
+_FILENAME_TRANS = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
 
 # Ensure the mock drive directory exists
 os.makedirs(MOCK_DRIVE_ROOT, exist_ok=True)
 
+# Absolute drive root, resolved once. The trailing separator keeps sibling
+# directories such as "mock_drive_evil" from passing the prefix check.
+_MOCK_DRIVE_ABS = os.path.abspath(MOCK_DRIVE_ROOT) + os.sep
+
+def _build_file_index() -> Dict[str, str]:
+    """Maps file IDs to stored filenames with a single scan of MOCK_DRIVE_ROOT."""
+    index = {}
+    with os.scandir(MOCK_DRIVE_ROOT) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False):
+                index[entry.name[:FILE_ID_LENGTH]] = entry.name
+    return index
+
+# In-memory file_id -> filename index; kept current by upload_file
+_FILE_INDEX: Dict[str, str] = _build_file_index()
+
 # --- Utility Functions ---
 
-def _generate_file_id(filename: str) -> str:
-    """Generates a unique file ID based on filename and timestamp."""
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
-    return hashlib.sha256(f"{filename}-{timestamp}".encode()).hexdigest()[:12]
+def _contains_malware(file_content: bytes) -> bool:
+    """Checks file content against the known malware signatures."""
+    return any(sig in file_content for sig in MALWARE_SIGNATURES)
+
+def _hash_stream(stream: BinaryIO) -> str:
+    """
+    Computes the SHA-256 hex digest of a binary file-like object.
+
+    Uses hashlib.file_digest (Python 3.11+), which reads and hashes in C,
+    and falls back to a 1 MiB chunked loop on older interpreters.
+    """
+    if sys.version_info >= (3, 11):
+        return hashlib.file_digest(stream, "sha256").hexdigest()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def _hash_content(file_content: bytes) -> str:
+    """Computes the SHA-256 hex digest of in-memory file content."""
+    return _hash_stream(io.BytesIO(file_content))
+
+def _generate_file_id(content_digest: str) -> str:
+    """Derives a content-addressed file ID from the file's SHA-256 digest."""
+    return content_digest[:FILE_ID_LENGTH]
 
 def _get_file_extension(filename: str) -> str:
     """Extracts the file extension from a filename."""
@@ -54,18 +115,20 @@ def _is_allowed_file_type(mime_type: str) -> bool:
     """Checks if the given MIME type is in the allowlist."""
     return mime_type in ALLOWED_FILE_TYPES
 
+@functools.lru_cache(maxsize=32)
+def _mime_for_ext(ext: str) -> Optional[str]:
+    """Looks up (and caches) the MIME type for a lowercased file extension."""
+    mime_type, _ = mimetypes.guess_type(f"file{ext}")
+    return mime_type
+
 def _get_mime_type(filename: str) -> Optional[str]:
     """Determines the MIME type of a file based on its extension."""
-    mime_type, _ = mimetypes.guess_type(filename)
-    return mime_type
+    return _mime_for_ext(_get_file_extension(filename))
 
 def _sanitize_filename(filename: str) -> str:
     """Sanitizes a filename to prevent directory traversal and invalid characters."""
-    # Remove any directory components
-    filename = os.path.basename(filename)
-    # Replace invalid characters with underscores
-    filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
-    return filename
+    # Remove any directory components, then replace invalid characters with underscores
+    return os.path.basename(filename).translate(_FILENAME_TRANS)
 
 def _resolve_safe_path(filename: str) -> Optional[str]:
     """
@@ -75,11 +138,50 @@ def _resolve_safe_path(filename: str) -> Optional[str]:
     sanitized_filename = _sanitize_filename(filename)
     target_path = os.path.join(MOCK_DRIVE_ROOT, sanitized_filename)
     # Ensure the resolved path is strictly within MOCK_DRIVE_ROOT
-    if not os.path.abspath(target_path).startswith(os.path.abspath(MOCK_DRIVE_ROOT)):
+    if not os.path.abspath(target_path).startswith(_MOCK_DRIVE_ABS):
         logging.warning(f"Path traversal attempt detected for: {filename}")
         return None
     return target_path
 
+def _write_direct(path: str, file_content: bytes) -> bool:
+    """
+    Writes a large upload with O_DIRECT, skipping the page cache.
+
+    The data is copied into a page-aligned anonymous mmap padded to
+    DIRECT_IO_ALIGN, written in full, then truncated back to its real size.
+    Returns False without leaving a partial file when O_DIRECT is unavailable
+    or rejected (e.g. EINVAL on tmpfs), so the caller can fall back to a
+    buffered write.
+    """
+    if not hasattr(os, "O_DIRECT"):
+        return False
+    size = len(file_content)
+    aligned_size = -(-size // DIRECT_IO_ALIGN) * DIRECT_IO_ALIGN
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o666)
+    except OSError:
+        return False
+    try:
+        with mmap.mmap(-1, aligned_size) as buf:
+            buf.write(file_content)
+            view = memoryview(buf)
+            try:
+                written = 0
+                while written < aligned_size:
+                    written += os.write(fd, view[written:])
+            finally:
+                view.release()
+        os.ftruncate(fd, size)
+    except OSError:
+        os.close(fd)
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        return False
+    os.close(fd)
+    return True
+
 # --- MCP Drive Server Operations ---
 
 def upload_file(
@@ -103,7 +205,7 @@ def upload_file(
     # 1. Malware Upload Prevention (Stub)
     # In a real system, this would integrate with a malware scanner.
     # For this exercise, we'll simulate a check.
-    if b"malware_signature" in file_content:
+    if _contains_malware(file_content):
         logging.error(f"Malware signature detected in {filename}. Upload blocked.")
         return {"status": "error", "message": "Malware detected, upload blocked."}
 
@@ -132,13 +234,16 @@ def upload_file(
     if not safe_path:
         return {"status": "error", "message": "Invalid filename or path traversal attempt."}
 
-    file_id = _generate_file_id(filename)
+    content_sha256 = _hash_content(file_content)
+    file_id = _generate_file_id(content_sha256)
     final_filename = f"{file_id}{_get_file_extension(filename)}"
     full_path = os.path.join(MOCK_DRIVE_ROOT, final_filename)
 
     try:
-        with open(full_path, "wb") as f:
-            f.write(file_content)
+        if len(file_content) < DIRECT_WRITE_MIN_BYTES or not _write_direct(full_path, file_content):
+            with open(full_path, "wb") as f:
+                f.write(file_content)
+        _FILE_INDEX[file_id] = final_filename
         logging.info(f"Successfully uploaded {filename} as {final_filename} (ID: {file_id})")
         return {
             "status": "success",
@@ -148,6 +253,7 @@ def upload_file(
             "original_filename": filename,
             "mime_type": mime_type,
             "size_bytes": len(file_content),
+            "sha256": content_sha256,
             "upload_timestamp": datetime.now().isoformat()
         }
     except IOError as e:
@@ -167,25 +273,17 @@ def read_file(file_id: str) -> Dict[str, Any]:
     logging.info(f"Attempting to read file with ID: {file_id}")
 
     # Find the actual filename associated with the file_id
-    found_file = None
-    for fname in os.listdir(MOCK_DRIVE_ROOT):
-        if fname.startswith(file_id):
-            found_file = fname
-            break
+    found_file = _FILE_INDEX.get(file_id)
 
     if not found_file:
         logging.warning(f"File with ID {file_id} not found.")
         return {"status": "error", "message": "File not found."}
 
-    # Path traversal protection is implicitly handled by using the found_file
-    # which is guaranteed to be directly in MOCK_DRIVE_ROOT.
+    # Path traversal protection is implicitly handled by using the found_file,
+    # which comes from the file index: either a scandir entry name or a name
+    # built by upload_file, so it never contains a path separator.
     full_path = os.path.join(MOCK_DRIVE_ROOT, found_file)
 
-    # Double-check path safety (redundant but good for defense-in-depth)
-    if not os.path.abspath(full_path).startswith(os.path.abspath(MOCK_DRIVE_ROOT)):
-        logging.error(f"Path traversal detected during read for ID: {file_id}")
-        return {"status": "error", "message": "Security violation: Path traversal attempt detected."}
-
     try:
         with open(full_path, "rb") as f:
             content = f.read()
@@ -197,6 +295,11 @@ def read_file(file_id: str) -> Dict[str, Any]:
             "filename": found_file,
             "content": content.decode('utf-8', errors='ignore') # Assuming text content for display
         }
+    except FileNotFoundError:
+        # Removed behind our back; drop the stale index entry
+        _FILE_INDEX.pop(file_id, None)
+        logging.warning(f"File with ID {file_id} not found.")
+        return {"status": "error", "message": "File not found."}
     except IOError as e:
         logging.error(f"Error reading file {found_file} (ID: {file_id}): {e}")
         return {"status": "error", "message": f"Failed to read file: {e}"}
@@ -215,37 +318,80 @@ def search_files(query: str, use_rag: bool = False) -> Dict[str, Any]:
     """
     logging.info(f"Searching for files with query: '{query}', RAG: {use_rag}")
     results = []
-    all_files = os.listdir(MOCK_DRIVE_ROOT)
-
-    for fname in all_files:
-        full_path = os.path.join(MOCK_DRIVE_ROOT, fname)
-        if not os.path.isfile(full_path):
-            continue
-
-        file_id = fname[:12] # Assuming first 12 chars are the ID
+    query_lower = query.lower()
+    # ASCII queries are matched as raw bytes (ASCII case-insensitive) over an
+    # mmap of each file, so files are never copied into Python objects,
+    # decoded, or lowercased; only the excerpt is decoded. Bytes IGNORECASE
+    # folds ASCII letters only, so other queries are matched on the decoded,
+    # lowercased text instead.
+    if query.isascii():
+        query_pattern = re.compile(re.escape(query.encode('ascii')), re.IGNORECASE)
+    else:
+        query_pattern = None
+
+    # Single scandir pass: DirEntry caches the file type, so no per-entry stat
+    with os.scandir(MOCK_DRIVE_ROOT) as entries:
+        all_files = [
+            entry for entry in entries
+            if entry.name.endswith(_ALLOWED_EXTENSIONS) and entry.is_file(follow_symlinks=False)
+        ]
+
+    # One read buffer for the whole scan, reused for every small file
+    scan_buffer = memoryview(bytearray(SEARCH_BUFFER_BYTES))
+
+    for entry in all_files:
+        fname = entry.name
+        full_path = entry.path
+        file_id = fname[:FILE_ID_LENGTH] # Assuming first 12 chars are the ID
 
         try:
-            with open(full_path, "r", encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-
-            if query.lower() in content.lower() or query.lower() in fname.lower():
-                result_item = {
-                    "file_id": file_id,
-                    "filename": fname,
-                    "match_type": "keyword",
-                    "excerpt": content[:200] + "..." if len(content) > 200 else content,
-                    "provenance": {
-                        "source_id": file_id,
-                        "timestamp": datetime.fromtimestamp(os.path.getmtime(full_path)).isoformat(),
-                        "method": "direct_file_match"
-                    }
-                }
-                results.append(result_item)
-
-        except Exception as e:
+            with open(full_path, "rb") as f:
+                if query_lower in fname.lower():
+                    # Filename hit: only the excerpt is needed from the file
+                    data = f.read(_EXCERPT_WINDOW_BYTES)
+                elif query_pattern is None:
+                    content = f.read()
+                    if query_lower not in content.decode('utf-8', errors='ignore').lower():
+                        continue
+                    data = content[:_EXCERPT_WINDOW_BYTES]
+                elif entry.stat(follow_symlinks=False).st_size <= SEARCH_BUFFER_BYTES:
+                    # Small file: a read into the shared buffer beats mmap setup
+                    # and teardown, and allocates nothing per file
+                    view = scan_buffer[:f.readinto(scan_buffer)]
+                    if query_pattern.search(view) is None:
+                        continue
+                    data = bytes(view[:_EXCERPT_WINDOW_BYTES])
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        if query_pattern.search(mm) is None:
+                            continue
+                        data = mm[:_EXCERPT_WINDOW_BYTES]
+            mtime = entry.stat(follow_symlinks=False).st_mtime
+        except (OSError, ValueError) as e:
+            # ValueError: mmap of a file truncated to zero since it was stat'd
             logging.error(f"Error processing file {fname} during search: {e}")
             continue
 
+        # Decode the whole window, then cut by characters. A character split
+        # by the window's end is dropped, and lies past the cut anyway.
+        text = data.decode('utf-8', errors='ignore')
+        excerpt = text[:SEARCH_EXCERPT_CHARS]
+        if len(text) > SEARCH_EXCERPT_CHARS:
+            excerpt += "..."
+
+        result_item = {
+            "file_id": file_id,
+            "filename": fname,
+            "match_type": "keyword",
+            "excerpt": excerpt,
+            "provenance": {
+                "source_id": file_id,
+                "timestamp": datetime.fromtimestamp(mtime).isoformat(),
+                "method": "direct_file_match"
+            }
+        }
+        results.append(result_item)
+
     if use_rag:
         # RAG Stub with Source ID for provenance
         # In a real RAG system, this would involve embedding the query and documents,
@@ -19,7 +19,9 @@ Run as: python3 -m agents.mcp_email_server
 
 import re
 import json
+import atexit
 import logging
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional, List
@@ -30,6 +32,11 @@ from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+try:
+    import re2  # Optional: google-re2 linear-time (non-backtracking) regex engine
+except ImportError:
+    re2 = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -37,24 +44,65 @@ logging.basicConfig(
 )
 logger = logging.getLogger("email_mcp_server")
 
-# Email validation regex (RFC 5322 simplified)
-EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+# Email validation regex (RFC 5322 simplified). Matched against ASCII bytes with
+# fullmatch; compiled with re2 when available.
+EMAIL_REGEX = (re2 or re).compile(rb'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
 
-# HTML tag removal regex for XSS prevention
-HTML_TAG_REGEX = re.compile(r'<[^>]+>')
+# HTML tag removal regex for XSS prevention. Compiled with re2 when available:
+# a DFA scan with no backtracking, linear in the body length.
+HTML_TAG_REGEX = (re2 or re).compile(r'<[^>]+>')
 
 # Audit log path
 LOG_DIR = Path("./logs")
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 EMAIL_AUDIT_LOG = LOG_DIR / "email_mcp_audit.jsonl"
+_audit_fh = None  # Line-buffered append handle, held for the process lifetime
 
 # SQLite database for mock inbox/outbox
 DB_PATH = Path("./mock_email.db")
 
+_INSERT_SQL = "INSERT INTO emails (from_addr, to_addr, subject, body, timestamp) VALUES (?, ?, ?, ?, ?)"
+
+# One connection shared by all tool calls; the lock serializes access to it
+_db_conn: Optional[sqlite3.Connection] = None
+_db_lock = threading.Lock()
+
+
+def _open_db_connection() -> sqlite3.Connection:
+    """Open the shared autocommit connection with WAL journaling."""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def _close_db_connection() -> None:
+    """Close the shared connection, if open."""
+    global _db_conn
+    if _db_conn is not None:
+        _db_conn.close()
+        _db_conn = None
+
+
+atexit.register(_close_db_connection)
+
 
 def init_database():
     """Initialize SQLite database for email storage."""
-    conn = sqlite3.connect(DB_PATH)
+    global _db_conn
+    with _db_lock:
+        # Reopen so a database file removed since the last init is recreated
+        _close_db_connection()
+        _db_conn = _open_db_connection()
+        _create_schema(_db_conn)
+    _open_audit_log()
+    logger.info(f"[EmailMCP] Database initialized at {DB_PATH}")
+
+
+def _create_schema(conn: sqlite3.Connection) -> None:
+    """Create the email tables if they do not exist."""
     cursor = conn.cursor()
     
     cursor.execute("""
@@ -69,26 +117,56 @@ def init_database():
         )
     """)
     
-    conn.commit()
-    conn.close()
-    logger.info(f"[EmailMCP] Database initialized at {DB_PATH}")
+    # Covering index for list_emails: newest-first listing reads index pages
+    # only and never touches the table pages that hold message bodies
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_emails_list
+        ON emails (id, from_addr, to_addr, subject, timestamp, status)
+    """)
 
 
 @contextmanager
 def get_db_connection():
-    """Context manager for database connections."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    try:
-        yield conn
-    finally:
-        conn.close()
+    """Context manager yielding the shared database connection (held under lock)."""
+    global _db_conn
+    with _db_lock:
+        if _db_conn is None:
+            _db_conn = _open_db_connection()
+        yield _db_conn
+
+
+def store_emails(rows: List[tuple]) -> None:
+    """
+    Insert several emails in a single transaction.
+    
+    One BEGIN IMMEDIATE ... COMMIT around executemany pays for journaling
+    and syncing once for the whole batch instead of once per row.
+    
+    Args:
+        rows: (from_addr, to_addr, subject, body, timestamp) tuples
+    """
+    with get_db_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(_INSERT_SQL, rows)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def _open_audit_log():
+    """Open the audit log once; line buffering flushes each event as written."""
+    global _audit_fh
+    if _audit_fh is None:
+        _audit_fh = EMAIL_AUDIT_LOG.open("a", encoding="utf-8", buffering=1)
+        atexit.register(_audit_fh.close)
+    return _audit_fh
 
 
 def write_audit_log(event: dict) -> None:
     """Write security event to audit log."""
-    with EMAIL_AUDIT_LOG.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(event) + "\n")
+    _open_audit_log().write(json.dumps(event) + "\n")
 
 
 def validate_email(email: str) -> bool:
@@ -104,7 +182,10 @@ def validate_email(email: str) -> bool:
     Returns:
         True if valid, False otherwise
     """
-    return EMAIL_REGEX.match(email) is not None
+    # Non-ASCII can never match the pattern; reject before encoding
+    if not email.isascii():
+        return False
+    return EMAIL_REGEX.fullmatch(email.encode("ascii")) is not None
 
 
 def sanitize_html(text: str) -> str:
@@ -120,6 +201,9 @@ def sanitize_html(text: str) -> str:
     Returns:
         Sanitized text with HTML removed
     """
+    # No '<' means no tag; skip the regex engine for plain text
+    if '<' not in text:
+        return text
     return HTML_TAG_REGEX.sub('', text)
 
 
@@ -172,6 +256,10 @@ async def list_tools() -> list[Tool]:
                         "type": "integer",
                         "description": "Offset for pagination (default 0)",
                         "default": 0
+                    },
+                    "before_id": {
+                        "type": "integer",
+                        "description": "Keyset pagination: only return emails with ID below this (use next_before_id from the previous page; overrides offset)"
                     }
                 }
             }
@@ -203,6 +291,8 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         subject = arguments.get("subject", "")
         body = arguments.get("body", "")
         from_addr = arguments.get("from_addr", "system@company.com")
+        # One clock read per call, shared by the row, audit event and response
+        timestamp = datetime.now(timezone.utc).isoformat()
         
         # ⚠️ SECURITY-CRITICAL: Email Validation
         # Blue Team Defense: Input Validation (Section 3.5)
@@ -212,7 +302,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
             
             # Audit log - security event
             write_audit_log({
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": timestamp,
                 "action": "send_email_failed",
                 "to": to[:50],  # Truncate for security
                 "error": "Invalid email format",
@@ -246,21 +336,20 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         # Blue Team Defense: Prevent Stored XSS (Section 3.5)
         sanitized_body = sanitize_html(body)
         sanitized_subject = sanitize_html(subject)
+        # Bodies without '<' are returned unchanged; only compare the rest
+        html_stripped = '<' in body and sanitized_body != body
         
-        if sanitized_body != body:
+        if html_stripped:
             logger.warning(f"[EmailMCP] HTML tags stripped from body")
         
         # Store email in database
-        timestamp = datetime.now(timezone.utc).isoformat()
-        
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                "INSERT INTO emails (from_addr, to_addr, subject, body, timestamp) VALUES (?, ?, ?, ?, ?)",
+                _INSERT_SQL,
                 (from_addr, to, sanitized_subject, sanitized_body, timestamp)
             )
             email_id = cursor.lastrowid
-            conn.commit()
         
         # ⚠️ SECURITY-CRITICAL: Audit Logging with [REDACTED]
         # Blue Team Defense: Privacy Protection (Section 3.5)
@@ -272,7 +361,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
             "to": to,
             "subject": sanitized_subject,
             "body": "[REDACTED]",  # Privacy protection
-            "html_stripped": sanitized_body != body,
+            "html_stripped": html_stripped,
             "severity": "INFO"
         })
         
@@ -286,20 +375,29 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
                 "to": to,
                 "subject": sanitized_subject,
                 "timestamp": timestamp,
-                "html_stripped": sanitized_body != body
+                "html_stripped": html_stripped
             })
         )]
     
     elif name == "list_emails":
         limit = arguments.get("limit", 10)
         offset = arguments.get("offset", 0)
+        before_id = arguments.get("before_id")
         
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                "SELECT id, from_addr, to_addr, subject, timestamp, status FROM emails ORDER BY id DESC LIMIT ? OFFSET ?",
-                (limit, offset)
-            )
+            if before_id is not None:
+                # Keyset pagination: seeks straight to the page instead of
+                # stepping over `offset` rows
+                cursor.execute(
+                    "SELECT id, from_addr, to_addr, subject, timestamp, status FROM emails WHERE id < ? ORDER BY id DESC LIMIT ?",
+                    (before_id, limit)
+                )
+            else:
+                cursor.execute(
+                    "SELECT id, from_addr, to_addr, subject, timestamp, status FROM emails ORDER BY id DESC LIMIT ? OFFSET ?",
+                    (limit, offset)
+                )
             emails = cursor.fetchall()
         
         email_list = [
@@ -323,7 +421,8 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
                 "emails": email_list,
                 "count": len(email_list),
                 "limit": limit,
-                "offset": offset
+                "offset": offset,
+                "next_before_id": email_list[-1]["id"] if email_list else None
             })
         )]
     
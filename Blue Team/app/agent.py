@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import re
 import json
+import hashlib
+import time
+import atexit
 import logging
+import itertools
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import requests
-import random
-import uuid
+from requests.adapters import HTTPAdapter
+import secrets
 import os
 from pathlib import Path
-from datetime import datetime, timezone
+from types import MappingProxyType
 from typing import Any, Optional
 
 # Import mock APIs and ExpenseAgent
@@ -37,11 +45,220 @@ _security_manager = SecurityManager(
     mcp_secret=MCP_SECRET
 )
 
+
+# Headers sent with every MCP message; per-message signature headers are merged in
+_BASE_MCP_HEADERS = {"Content-Type": "application/json"}
+
+
+def _build_mcp_session() -> requests.Session:
+    """
+    HTTP session for MCP sends with keep-alive connection pooling.
+    
+    Shared at module level because an Agent is built per request. Sends are
+    not retried: a refused connection has to fail within MCP_RESULT_WAIT so
+    the task records the direct-call fallback, and the circuit breaker
+    already handles an MCP server that stays down.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_mcp_session = _build_mcp_session()
+
+# MCP circuit breaker: after MCP_BREAKER_THRESHOLD consecutive connection
+# failures, sends fail fast for MCP_BREAKER_COOLDOWN seconds instead of each
+# waiting out the request timeout; the first send after that probes again
+MCP_BREAKER_THRESHOLD = 3
+MCP_BREAKER_COOLDOWN = 30.0  # seconds
+
+
+class _CircuitBreaker:
+    """Consecutive-failure circuit breaker shared by all Agent instances."""
+    
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """Whether a call may be attempted (circuit closed or cooldown over)."""
+        return time.monotonic() >= self._open_until
+    
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._open_until = 0.0
+    
+    def record_failure(self) -> None:
+        # The count is kept after opening, so a failed probe reopens at once
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.threshold:
+                self._open_until = time.monotonic() + self.cooldown
+
+
+_mcp_breaker = _CircuitBreaker(MCP_BREAKER_THRESHOLD, MCP_BREAKER_COOLDOWN)
+
+# Runs MCP sends in the background so the network round trip overlaps
+# with local expense processing
+_mcp_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="mcp-send")
+
+# How long handle_task waits for the MCP send after local processing is done.
+# Sends still in flight complete in the background (fire-and-forget); one
+# that then fails is logged as an mcp_delivery_failed event.
+MCP_RESULT_WAIT = 0.2  # seconds
+
+# Read-only templates for the static fields of recurring security events;
+# each event copies one and adds its timestamp and dynamic fields
+_EVT_MCP_SUCCESS_TPL = MappingProxyType({
+    "actor": "core_agent",
+    "action": "mcp_message_sent",
+    "status": "success",
+    "security_method": "HMAC-SHA256"
+})
+_EVT_DENYLIST_TPL = MappingProxyType({
+    "actor": "security",
+    "action": "denylisted_action_blocked",
+    "severity": "HIGH"
+})
+_EVT_IDENTITY_TPL = MappingProxyType({
+    "actor": "identity_validator",
+    "severity": "HIGH"
+})
+_EVT_ANOMALY_TPL = MappingProxyType({
+    "actor": "anomaly_detector",
+    "action": "ANOMALY_HIGH_VALUE_REQUEST",
+    "severity": "HIGH"
+})
+
+# Planner task classification. Two patterns rather than one alternation so
+# expense keywords win wherever they appear, as before; IGNORECASE avoids
+# building a lowercased copy of the task.
+_EXPENSE_TASK_RE = re.compile(r'expense|reimbursement', re.IGNORECASE)
+_RETRIEVAL_TASK_RE = re.compile(r'retrieve|deploy', re.IGNORECASE)
+_SHA256_HEX_RE = re.compile(r'[0-9a-f]{64}')
+
+# MCP task IDs: "<pid>-<n>", unique across worker processes without an RNG draw
+_PID = os.getpid()
+_TASK_ID_COUNTER = itertools.count(1)
+
+
+def _reset_task_ids() -> None:
+    """Give a forked worker its own PID prefix and counter."""
+    global _PID, _TASK_ID_COUNTER
+    _PID = os.getpid()
+    _TASK_ID_COUNTER = itertools.count(1)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_task_ids)
+
 # Configure logging for hallucination detection
 
 logger = logging.getLogger(__name__)
 
 
+def _now_iso() -> str:
+    """
+    Current UTC time as an ISO 8601 string with microseconds.
+    
+    Same format as datetime.now(timezone.utc).isoformat(), built from
+    time.time_ns() without constructing a datetime object.
+    """
+    sec, ns = divmod(time.time_ns(), 1_000_000_000)
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(sec)) + f'.{ns // 1000:06d}+00:00'
+
+
+# Event log batching: events are appended in one write once this many are
+# buffered, or by the background flusher at least every EVENT_FLUSH_INTERVAL.
+# Agent.handle_task also flushes before it returns, so a request's events are
+# on disk before main.py appends its own. Events still buffered when the
+# process is killed (not a clean exit, which flushes via atexit) are lost.
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "64"))
+EVENT_FLUSH_INTERVAL = 0.05  # seconds
+
+def _encode_event(event: dict) -> bytes:
+    """Encodes one event as a JSONL record, in the same format main.py writes."""
+    return (json.dumps(event) + "\n").encode("utf-8")
+
+
+class _EventBatcher:
+    """Buffers JSONL records for one log file and appends them in batches."""
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._buf: list[bytes] = []
+        self._buf_lock = threading.Lock()
+        # Serializes writers so batches land in the order they were swapped out
+        self._write_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._fd: Optional[int] = None  # O_APPEND descriptor, opened on first flush
+        threading.Thread(
+            target=self._run, name=f"event-flusher:{path.name}", daemon=True
+        ).start()
+        atexit.register(self.close)
+    
+    def add(self, line: bytes) -> None:
+        """Queue one line; flush inline when the batch is full or overdue."""
+        with self._buf_lock:
+            self._buf.append(line)
+            due = (
+                len(self._buf) >= EVENT_BATCH_SIZE
+                or time.monotonic() - self._last_flush >= EVENT_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+    
+    def flush(self) -> None:
+        """Append all buffered records with a single write."""
+        with self._write_lock:
+            with self._buf_lock:
+                batch, self._buf = self._buf, []
+                self._last_flush = time.monotonic()
+            if batch:
+                if self._fd is None:
+                    self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                # One O_APPEND write per batch; loop only on a short write
+                data = memoryview(b"".join(batch))
+                while data:
+                    data = data[os.write(self._fd, data):]
+    
+    def close(self) -> None:
+        """Flush remaining records and close the log file."""
+        self.flush()
+        with self._write_lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+    
+    def _run(self) -> None:
+        while True:
+            time.sleep(EVENT_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except OSError as e:
+                logger.error("Failed to flush events to %s: %s", self.path, e)
+
+
+# One batcher per log file, shared by every Agent instance writing to it
+_event_batchers: dict[Path, _EventBatcher] = {}
+_event_batchers_lock = threading.Lock()
+
+
+def _get_event_batcher(path: Path) -> _EventBatcher:
+    key = path.resolve()
+    with _event_batchers_lock:
+        batcher = _event_batchers.get(key)
+        if batcher is None:
+            batcher = _event_batchers[key] = _EventBatcher(key)
+        return batcher
+
+
 class Agent:
     """
     Core Agent class implementing MAESTRO Foundation Models defense and orchestration.
@@ -52,6 +269,24 @@ class Agent:
     - Integration with specialized agents (ExpenseAgent)
     """
     
+    # Known ambiguous words that trigger hallucination flags, compiled once
+    # into a single case-insensitive alternation so each prompt is scanned
+    # in one pass without building a lowercased copy
+    AMBIGUOUS_KEYWORDS = ('atlantis', 'fake study', 'perpetual motion')
+    _AMBIGUOUS_RE = re.compile(
+        '|'.join(map(re.escape, AMBIGUOUS_KEYWORDS)), re.IGNORECASE
+    )
+    
+    # Requests above this amount are logged as high-value anomalies
+    ANOMALY_THRESHOLD = 5000.00
+    
+    # Most expense rows accepted in one batched task (see _handle_rows)
+    MAX_TASK_ROWS = 100
+    
+    # Largest csv_document content accepted, in characters; matches the
+    # MAX_CSV_CHARS check in static/chat.js
+    MAX_CSV_DOCUMENT_CHARS = 5_000_000
+    
     def __init__(self, retriever: Optional[Any] = None):
         """
         Initialize the Agent with retriever and specialized agents.
@@ -62,6 +297,7 @@ class Agent:
         self.log_dir = Path("./logs")
         self.log_dir.mkdir(parents=True, exist_ok=True)
         self.events_log = self.log_dir / "events.jsonl"
+        self._events = _get_event_batcher(self.events_log)
         
         # Store retriever - initialize default if not provided
         if retriever is None:
@@ -73,6 +309,10 @@ class Agent:
         
         # Agent Frameworks: Allow/Deny List for security controls
         self.DENY_LIST = ['system_shutdown', 'file_write', 'transfer_all_funds']
+        # Whole deny list as one case-insensitive alternation: one pass per string
+        self._deny_re = re.compile(
+            '|'.join(map(re.escape, self.DENY_LIST)), re.IGNORECASE
+        )
         
         # Model Context Protocol: Tool/Protocol Map for dynamic routing
         self.tool_map = {
@@ -104,12 +344,8 @@ class Agent:
         Returns:
             dict with keys: output, flagged, confidence, hallucination_detected
         """
-        # Check for known ambiguous words that trigger hallucination flags
-        ambiguous_keywords = ['atlantis', 'fake study', 'perpetual motion']
-        prompt_lower = prompt.lower()
-        
         # Determine if prompt contains ambiguous content
-        flagged = any(keyword in prompt_lower for keyword in ambiguous_keywords)
+        flagged = self._AMBIGUOUS_RE.search(prompt) is not None
         
         # Simulate confidence scoring
         # If flagged, set confidence to 0.2 (low confidence)
@@ -125,7 +361,7 @@ class Agent:
         
         # Log the hallucination detection event
         log_entry = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": _now_iso(),
             "actor": "agent",
             "action": "hallucination_detection",
             "prompt": prompt,
@@ -139,8 +375,9 @@ class Agent:
         
         # Log to standard logger as well
         logger.info(
-            f"Hallucination detection: flagged={flagged}, confidence={confidence}, "
-            f"hallucination_detected={hallucination_detected}"
+            "Hallucination detection: flagged=%s, confidence=%s, "
+            "hallucination_detected=%s",
+            flagged, confidence, hallucination_detected
         )
         
         # Generate simulated output
@@ -157,9 +394,8 @@ class Agent:
         }
     
     def _write_event(self, event: dict) -> None:
-        """Write an event to the events.jsonl log file."""
-        with self.events_log.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(event) + "\n")
+        """Queue an event for the events.jsonl log file (written in batches)."""
+        self._events.add(_encode_event(event))
     
     def send_mcp_message(
         self, 
@@ -188,6 +424,13 @@ class Agent:
         Returns:
             Response from MCP server or error dict
         """
+        if not _mcp_breaker.allow():
+            logger.warning("[MCP] Circuit open: skipping send to %s", recipient)
+            return {
+                "status": "error",
+                "message": "MCP server unavailable (circuit open) - will use direct call fallback"
+            }
+        
         message_data = {
             "sender": "CoreAgent",
             "recipient": recipient,
@@ -199,8 +442,7 @@ class Agent:
         # Generate HMAC signature with nonce and timestamp
         mcp_signature = _security_manager.create_mcp_signature(message_data)
         
-        headers = {
-            "Content-Type": "application/json",
+        headers = _BASE_MCP_HEADERS | {
             "signature": mcp_signature.signature,
             "X-Nonce": mcp_signature.nonce,
             "X-Timestamp": str(mcp_signature.timestamp)
@@ -208,46 +450,47 @@ class Agent:
         
         try:
             logger.info(
-                f"[MCP] Sending HMAC-signed message to {recipient} "
-                f"(Protocol: {protocol}, Task: {task_id}, Nonce: {mcp_signature.nonce})"
+                "[MCP] Sending HMAC-signed message to %s "
+                "(Protocol: %s, Task: %s, Nonce: %s)",
+                recipient, protocol, task_id, mcp_signature.nonce
             )
-            response = requests.post(
+            response = _mcp_session.post(
                 f"{MCP_URL}/send",
                 json=message_data,
                 headers=headers,
                 timeout=5
             )
+            # Any HTTP response means the server is reachable
+            _mcp_breaker.record_success()
             
             if response.status_code == 200:
                 logger.info(
-                    f"[MCP] Message successfully sent to {recipient} "
-                    f"(Protocol: {protocol})"
+                    "[MCP] Message successfully sent to %s (Protocol: %s)",
+                    recipient, protocol
                 )
                 self._write_event({
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "actor": "core_agent",
-                    "action": "mcp_message_sent",
+                    "timestamp": _now_iso(),
+                    **_EVT_MCP_SUCCESS_TPL,
                     "recipient": recipient,
                     "protocol": protocol,
                     "task_id": task_id,
-                    "nonce": mcp_signature.nonce,
-                    "status": "success",
-                    "security_method": "HMAC-SHA256"
+                    "nonce": mcp_signature.nonce
                 })
                 return response.json()
             else:
                 logger.error(
-                    f"[MCP] Failed to send message: {response.status_code}"
+                    "[MCP] Failed to send message: %s", response.status_code
                 )
                 return {
                     "status": "error",
                     "message": f"MCP server returned {response.status_code}"
                 }
                 
-        except requests.exceptions.ConnectionError:
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            _mcp_breaker.record_failure()
             logger.error("[MCP] Connection error: MCP server not available")
             self._write_event({
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": _now_iso(),
                 "actor": "core_agent",
                 "action": "mcp_connection_error",
                 "recipient": recipient,
@@ -260,13 +503,36 @@ class Agent:
                 "message": "MCP server not available - will use direct call fallback"
             }
         except Exception as e:
-            logger.error(f"[MCP] Unexpected error: {e}")
+            logger.error("[MCP] Unexpected error: %s", e)
             return {
                 "status": "error",
                 "message": f"Unexpected error: {str(e)}"
             }
     
-    def plan(self, task: str, data: dict) -> list[str]:
+    def _log_late_mcp_failure(self, task: str, task_id: str, future) -> None:
+        """Records a background MCP send that failed after its task returned."""
+        try:
+            response = future.result()
+        except Exception as e:
+            response = {'status': 'error', 'message': str(e)}
+        if response.get('status') != 'error':
+            return
+        logger.error("[MCP Routing] Background send for task %s failed: %s", task_id, response.get('message'))
+        self._write_event({
+            "timestamp": _now_iso(),
+            "actor": "core_agent",
+            "action": "mcp_delivery_failed",
+            "task": task,
+            "task_id": task_id,
+            "error": response.get('message')
+        })
+    
+    @staticmethod
+    def _is_expense_task(task: str) -> bool:
+        """Whether the planner routes this task to the expense workflow."""
+        return _EXPENSE_TASK_RE.search(task) is not None
+    
+    def plan(self, task: str, data: dict, task_checked: bool = False) -> list[str]:
         """
         Plan the execution steps for a given task (Planner mechanism with MCP).
         
@@ -279,14 +545,14 @@ class Agent:
         Args:
             task: Task description
             data: Task data dictionary
+            task_checked: The task already passed _check_task_deny_list, so
+                only the plan steps are checked
             
         Returns:
             List of execution steps with protocol selection (may be blocked if deny-listed)
         """
-        task_lower = task.lower()
-        
         # Model Context Protocol: Dynamic Protocol Selection by LLM Planner
-        if 'expense' in task_lower or 'reimbursement' in task_lower:
+        if self._is_expense_task(task):
             # LLM selects external_mcp protocol for expense tasks
             protocol = self.tool_map['expense']
             plan = [
@@ -296,9 +562,9 @@ class Agent:
                 'notify:employee'
             ]
             logger.info(
-                f"[Planner] Created expense workflow plan with {protocol} protocol: {plan}"
+                "[Planner] Created expense workflow plan with %s protocol: %s", protocol, plan
             )
-        elif 'retrieve' in task_lower or 'deploy' in task_lower:
+        elif _RETRIEVAL_TASK_RE.search(task):
             # LLM selects internal_tool protocol for retrieval tasks
             protocol = self.tool_map['retrieval']
             plan = [
@@ -307,7 +573,7 @@ class Agent:
                 'execute:internal_class'
             ]
             logger.info(
-                f"[Planner] Created retrieval plan with {protocol} protocol: {plan}"
+                "[Planner] Created retrieval plan with %s protocol: %s", protocol, plan
             )
         else:
             # Default plan for other tasks (internal)
@@ -318,51 +584,249 @@ class Agent:
                 f"decide:{task}"
             ]
             logger.info(
-                f"[Planner] Created general workflow plan with {protocol} protocol: {plan}"
+                "[Planner] Created general workflow plan with %s protocol: %s", protocol, plan
             )
         
         # Agent Frameworks: Deny List Check
         # Iterate through plan steps and check for deny-listed keywords
         for step in plan:
-            step_lower = step.lower()
-            for denied_action in self.DENY_LIST:
-                if denied_action in step_lower:
-                    # Log high-risk event
-                    logger.error(f"[SECURITY] Deny-listed action detected: {denied_action} in step {step}")
-                    self._write_event({
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "actor": "security",
-                        "action": "denylisted_action_blocked",
-                        "severity": "HIGH",
-                        "blocked_action": denied_action,
-                        "original_plan": plan,
-                        "task": task
-                    })
-                    
-                    # Replace plan with security block
-                    plan = ['security_blocked:denylisted_action']
-                    logger.warning(f"[SECURITY] Plan blocked and replaced: {plan}")
-                    return plan
-        
-        # Also check the task itself for deny-listed keywords
-        for denied_action in self.DENY_LIST:
-            if denied_action in task_lower:
-                logger.error(f"[SECURITY] Deny-listed action detected in task: {denied_action}")
+            match = self._deny_re.search(step)
+            if match:
+                denied_action = match.group(0).lower()
+                # Log high-risk event
+                logger.error("[SECURITY] Deny-listed action detected: %s in step %s", denied_action, step)
                 self._write_event({
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "actor": "security",
-                    "action": "denylisted_action_blocked",
-                    "severity": "HIGH",
+                    "timestamp": _now_iso(),
+                    **_EVT_DENYLIST_TPL,
                     "blocked_action": denied_action,
+                    "original_plan": plan,
                     "task": task
                 })
                 
+                # Replace plan with security block
                 plan = ['security_blocked:denylisted_action']
-                logger.warning(f"[SECURITY] Task blocked due to deny list: {plan}")
+                logger.warning("[SECURITY] Plan blocked and replaced: %s", plan)
                 return plan
         
+        # Also check the task itself for deny-listed keywords
+        if task_checked:
+            return plan
+        return self._check_task_deny_list(task) or plan
+    
+    def _check_task_deny_list(self, task: str) -> Optional[list[str]]:
+        """
+        Check the task itself against the deny list.
+        
+        Args:
+            task: Task description
+            
+        Returns:
+            The security-block plan if a deny-listed action is found (the
+            event is logged), None otherwise
+        """
+        match = self._deny_re.search(task)
+        if not match:
+            return None
+        
+        denied_action = match.group(0).lower()
+        logger.error("[SECURITY] Deny-listed action detected in task: %s", denied_action)
+        self._write_event({
+            "timestamp": _now_iso(),
+            **_EVT_DENYLIST_TPL,
+            "blocked_action": denied_action,
+            "task": task
+        })
+        
+        plan = ['security_blocked:denylisted_action']
+        logger.warning("[SECURITY] Task blocked due to deny list: %s", plan)
         return plan
     
+    def _validate_identity(self, task: str, data: dict) -> Optional[dict]:
+        """
+        Identity Validation: Verify employee_id against HR system.
+        
+        This prevents unauthorized access and identity spoofing.
+        
+        Args:
+            task: Task description
+            data: Task data dictionary
+            
+        Returns:
+            Denial result if employee_id is missing or unknown, None if valid
+        """
+        employee_id = data.get('employee_id')
+        
+        if not employee_id:
+            logger.error("[Identity] Missing employee_id in expense request")
+            self._write_event({
+                "timestamp": _now_iso(),
+                **_EVT_IDENTITY_TPL,
+                "action": "SECURITY_ALERT_MISSING_EMPLOYEE_ID",
+                "task": task,
+                "reason": "Employee ID required for financial transactions"
+            })
+            return {
+                'status': 'denied',
+                'error': 'Missing employee_id',
+                'reason': 'Employee ID is required for expense processing',
+                'security_check': 'IDENTITY_VALIDATION_FAILED'
+            }
+        
+        # Validate employee exists in HR system
+        employee_profile = self.hr_api.get_profile(employee_id)
+        if employee_profile is None:
+            logger.error("[Identity] Invalid employee_id: %s not found in HR system", employee_id)
+            self._write_event({
+                "timestamp": _now_iso(),
+                **_EVT_IDENTITY_TPL,
+                "action": "SECURITY_ALERT_INVALID_EMPLOYEE_ID",
+                "employee_id": employee_id,
+                "task": task,
+                "reason": "Employee ID not found in HR system"
+            })
+            return {
+                'status': 'denied',
+                'error': 'Invalid employee_id',
+                'reason': f'Employee {employee_id} not found in HR system',
+                'security_check': 'IDENTITY_VALIDATION_FAILED'
+            }
+        
+        logger.info(
+            "[Identity] Employee validated: %s (%s)",
+            employee_id, employee_profile.get('full_name')
+        )
+        return None
+    
+    def _handle_rows(self, task: str, data: dict, rows: list) -> dict:
+        """
+        Handle several expense rows sent as one task (e.g. a CSV upload).
+        
+        Each row is merged over the shared task data and handled under the
+        batch task, so it gets the same deny-list, identity and anomaly
+        checks as a single submission. A row's own 'task' key is ignored:
+        /tasks authorizes and audits only the top-level task, so a row must
+        not be able to run a different one. Per-row text belongs in
+        'request_content'. A row that fails does not stop the rest.
+        
+        The batch may also describe the source file as 'csv_document'
+        ({'doc_id', 'title', 'size', 'sha256'}, hashed by the client), which
+        is logged for audit. If it carries the 'content' itself (at most
+        MAX_CSV_DOCUMENT_CHARS characters), the size and SHA-256 are computed
+        here and a client 'sha256' that does not match denies the batch. The
+        content is not stored or passed on to the rows.
+        
+        Args:
+            task: Task description every row is handled under
+            data: Task data; everything except 'rows' and 'csv_document' is
+                shared by all rows
+            rows: Per-row task data dictionaries
+            
+        Returns:
+            Batch result with one {'transaction_id', 'ok', 'result'} entry
+            per row, in the order the rows were sent. 'ok' is True only for
+            an approved expense (or a completed non-expense task).
+        """
+        if len(rows) > self.MAX_TASK_ROWS:
+            return {
+                'status': 'denied',
+                'error': 'Too many rows',
+                'reason': f'At most {self.MAX_TASK_ROWS} rows can be sent in one task'
+            }
+        
+        document = data.get('csv_document')
+        document_record = None
+        if isinstance(document, dict):
+            content = document.get('content')
+            reported_sha256 = document.get('sha256')
+            if isinstance(content, str):
+                if len(content) > self.MAX_CSV_DOCUMENT_CHARS:
+                    return {
+                        'status': 'denied',
+                        'error': 'CSV document too large',
+                        'reason': f'At most {self.MAX_CSV_DOCUMENT_CHARS} characters can be sent in one CSV document'
+                    }
+                content = content.encode('utf-8')
+                sha256 = hashlib.sha256(content).hexdigest()
+                if reported_sha256 is not None and reported_sha256 != sha256:
+                    return {
+                        'status': 'denied',
+                        'error': 'CSV document hash mismatch',
+                        'reason': 'The csv_document sha256 does not match its content'
+                    }
+                document_record = {
+                    'doc_id': document.get('doc_id'),
+                    'size': len(content),
+                    'sha256': sha256,
+                    'verified': True
+                }
+            elif isinstance(reported_sha256, str) and _SHA256_HEX_RE.fullmatch(reported_sha256):
+                size = document.get('size')
+                document_record = {
+                    'doc_id': document.get('doc_id'),
+                    'size': size if type(size) is int else None,
+                    'sha256': reported_sha256,
+                    'verified': False
+                }
+        if document_record is not None:
+            self._write_event({
+                "timestamp": _now_iso(),
+                "actor": "agent",
+                "action": "csv_document_received",
+                "title": document.get('title'),
+                "row_count": len(rows),
+                **document_record
+            })
+        
+        shared = {
+            key: value for key, value in data.items()
+            if key not in ('rows', 'csv_document')
+        }
+        results = []
+        for row in rows:
+            if not isinstance(row, dict):
+                results.append({
+                    'transaction_id': None,
+                    'ok': False,
+                    'result': {'status': 'error', 'error': 'Row must be an object'}
+                })
+                continue
+            row_data = {**shared, **row}
+            row_data.pop('rows', None)
+            row_data.pop('csv_document', None)
+            row_data.pop('task', None)
+            try:
+                result = self._run_task(task, row_data)
+            except Exception as e:
+                logger.error("[Batch] Row %s failed: %s", row_data.get('transaction_id'), e)
+                result = {'status': 'error', 'error': str(e)}
+            results.append({
+                'transaction_id': row_data.get('transaction_id'),
+                'ok': self._row_succeeded(result),
+                'result': result
+            })
+        
+        succeeded = sum(1 for r in results if r['ok'])
+        logger.info("[Batch] Handled %d row(s), %d succeeded", len(results), succeeded)
+        batch_result = {
+            'status': 'completed',
+            'row_count': len(results),
+            'succeeded': succeeded,
+            'rows': results
+        }
+        if document_record is not None:
+            batch_result['document'] = document_record
+        return batch_result
+    
+    @staticmethod
+    def _row_succeeded(result: Any) -> bool:
+        """True if a batched row's result is a success (an approved expense)."""
+        if not isinstance(result, dict):
+            return False
+        expense_result = result.get('expense_result')
+        if isinstance(expense_result, dict):
+            return expense_result.get('decision') == 'Approved'
+        return result.get('status') not in (None, 'denied', 'blocked', 'error')
+    
     def handle_task(self, task: str, data: dict) -> dict:
         """
         Handle a task by routing to appropriate agent (Agent Routing).
@@ -376,6 +840,9 @@ class Agent:
         Expected input data for expense tasks:
         {'employee_id': 'E420', 'amount': 150.00, 'request_content': 'Taxis to client meeting.'}
         
+        A 'rows' list of such dictionaries handles each one in turn (see
+        _handle_rows).
+        
         Args:
             task: Task description
             data: Task data dictionary
@@ -383,27 +850,47 @@ class Agent:
         Returns:
             Aggregated result dictionary with orchestration steps and agent results
         """
+        try:
+            return self._run_task(task, data)
+        finally:
+            # Write this request's events before returning, so they land ahead
+            # of anything the caller appends to events.jsonl afterwards
+            self._events.flush()
+    
+    def _run_task(self, task: str, data: dict) -> dict:
+        """Routes one task for handle_task, which flushes its events."""
+        rows = data.get('rows')
+        if isinstance(rows, list):
+            return self._handle_rows(task, data, rows)
+        
         # Evaluation & Observability: Anomaly Detection
-        # Check for high-value transactions (> $5000)
-        amount = data.get('amount', 0.0)
-        if amount > 5000.00:
-            logger.error(f"[ANOMALY] High-value request detected: ${amount}")
+        # Check for high-value transactions (> ANOMALY_THRESHOLD). The amount
+        # read here is reused by the expense branches below.
+        if (amount := data.get('amount', 0.0)) > self.ANOMALY_THRESHOLD:
+            logger.error("[ANOMALY] High-value request detected: $%s", amount)
             self._write_event({
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "actor": "anomaly_detector",
-                "action": "ANOMALY_HIGH_VALUE_REQUEST",
-                "severity": "HIGH",
+                "timestamp": _now_iso(),
+                **_EVT_ANOMALY_TPL,
                 "amount": amount,
                 "task": task,
                 "employee_id": data.get('employee_id', 'unknown')
             })
         
-        # Generate execution plan
-        plan = self.plan(task, data)
+        # Fast rejects before planning: deny-listed tasks and expense requests
+        # with a missing or unknown employee_id never reach the planner
+        plan = self._check_task_deny_list(task)
+        if plan is None:
+            if self._is_expense_task(task):
+                denial = self._validate_identity(task, data)
+                if denial is not None:
+                    return denial
+            
+            # Generate execution plan
+            plan = self.plan(task, data, task_checked=True)
         
         # Log task start
         self._write_event({
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": _now_iso(),
             "actor": "agent",
             "action": "task_start",
             "task": task,
@@ -416,61 +903,19 @@ class Agent:
             
             # Extract required fields for expense processing
             employee_id = data.get('employee_id')
-            amount = data.get('amount', 0.0)
             request_content = data.get('request_content', task)
             
-            # Identity Validation: Verify employee_id against HR system
-            # This prevents unauthorized access and identity spoofing
-            if not employee_id:
-                logger.error("[Identity] Missing employee_id in expense request")
-                self._write_event({
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "actor": "identity_validator",
-                    "action": "SECURITY_ALERT_MISSING_EMPLOYEE_ID",
-                    "severity": "HIGH",
-                    "task": task,
-                    "reason": "Employee ID required for financial transactions"
-                })
-                return {
-                    'status': 'denied',
-                    'error': 'Missing employee_id',
-                    'reason': 'Employee ID is required for expense processing',
-                    'security_check': 'IDENTITY_VALIDATION_FAILED'
-                }
-            
-            # Validate employee exists in HR system
-            employee_profile = self.hr_api.get_profile(employee_id)
-            if employee_profile is None:
-                logger.error(f"[Identity] Invalid employee_id: {employee_id} not found in HR system")
-                self._write_event({
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "actor": "identity_validator",
-                    "action": "SECURITY_ALERT_INVALID_EMPLOYEE_ID",
-                    "severity": "HIGH",
-                    "employee_id": employee_id,
-                    "task": task,
-                    "reason": "Employee ID not found in HR system"
-                })
-                return {
-                    'status': 'denied',
-                    'error': 'Invalid employee_id',
-                    'reason': f'Employee {employee_id} not found in HR system',
-                    'security_check': 'IDENTITY_VALIDATION_FAILED'
-                }
-            
-            logger.info(
-                f"[Identity] Employee validated: {employee_id} ({employee_profile.get('full_name')})"
-            )
             logger.info(
-                f"[MCP Routing] Processing expense: employee={employee_id}, "
-                f"amount=${amount}, request={request_content}"
+                "[MCP Routing] Processing expense: employee=%s, amount=$%s, request=%s",
+                employee_id, amount, request_content
             )
             
             # Generate unique task ID for tracking
-            task_id = str(random.randint(1000, 9999))
+            task_id = f"{_PID}-{next(_TASK_ID_COUNTER)}"
             
-            # Send message via MCP with expense_task protocol
-            mcp_response = self.send_mcp_message(
+            # Send message via MCP with expense_task protocol in the background
+            mcp_future = _mcp_executor.submit(
+                self.send_mcp_message,
                 recipient='ExpenseAgent',
                 payload={
                     'employee_id': employee_id,
@@ -481,39 +926,73 @@ class Agent:
                 protocol='expense_task'
             )
             
+            # The report is processed directly either way (direct call fallback
+            # if MCP is down; for demo otherwise), so run it while the send is
+            # in flight. In production: would wait for response message from MCP
+            expense_result = self.expense_agent.process_report(
+                employee_id=employee_id,
+                expense_amount=amount,
+                request_content=request_content
+            )
+            try:
+                mcp_response = mcp_future.result(timeout=MCP_RESULT_WAIT)
+            except FutureTimeoutError:
+                # Still in flight: the send finishes in the background and the
+                # result is returned without waiting out the round trip
+                mcp_response = {'status': 'pending'}
+                mcp_future.add_done_callback(
+                    functools.partial(self._log_late_mcp_failure, task, task_id)
+                )
+            
             # Check if MCP message was sent successfully
             if mcp_response.get('status') == 'error':
-                logger.warning("[MCP Routing] MCP unavailable, using direct call fallback")
-                # Fallback to direct call if MCP server is down
-                expense_result = self.expense_agent.process_report(
-                    employee_id=employee_id,
-                    expense_amount=amount,
-                    request_content=request_content
-                )
+                logger.warning("[MCP Routing] MCP unavailable, used direct call fallback")
             else:
-                # Message successfully queued in MCP
-                # For demo: still call agent directly to get result
-                # In production: would wait for response message from MCP
-                logger.info("[MCP Routing] Message queued in MCP, processing for demo")
-                expense_result = self.expense_agent.process_report(
-                    employee_id=employee_id,
-                    expense_amount=amount,
-                    request_content=request_content
-                )
+                # Message queued in MCP (or still being delivered)
+                delivery = 'pending' if mcp_response.get('status') == 'pending' else 'queued'
+                logger.info("[MCP Routing] Message %s in MCP, processed for demo", delivery)
                 # Add MCP metadata to result
                 expense_result['mcp_metadata'] = {
                     'task_id': task_id,
                     'message_id': mcp_response.get('message_id'),
                     'protocol': 'expense_task',
-                    'routing': 'external_mcp'
+                    'routing': 'external_mcp',
+                    'delivery': delivery
                 }
+            
+            decision = expense_result.get('decision')
+            self._write_event({
+                "timestamp": _now_iso(),
+                "actor": "expense_agent",
+                "action": "task_complete",
+                "task": task,
+                "decision": decision,
+                "reimbursement_amount": expense_result.get('reimbursement_amount'),
+                "task_id": task_id
+            })
+            
+            return {
+                'orchestration': {
+                    'plan': plan,
+                    'protocol': 'external_mcp',
+                    'steps_completed': [
+                        {'step': 'analyze:expense', 'status': 'completed'},
+                        {'step': 'protocol:mcp_send', 'status': mcp_response.get('status', 'queued')},
+                        {'step': 'execute:expense_agent_wait', 'status': 'completed', 'result': expense_result}
+                    ]
+                },
+                'task': task,
+                'expense_result': expense_result,
+                'decision': decision,
+                'status': 'completed'
+            }
         elif 'execute:internal_class' in plan:
             logger.info("[Agent Routing] Using internal_tool protocol")
             
             # Call internal retriever
             if self.retriever:
                 retrieval_result = self.retriever.get_context(task)
-                logger.info(f"[Internal Tool] Retrieved context: {retrieval_result}")
+                logger.info("[Internal Tool] Retrieved context: %s", retrieval_result)
                 
                 return {
                     'orchestration': {
@@ -546,7 +1025,6 @@ class Agent:
             logger.info("[Agent Routing] Using legacy direct call to ExpenseAgent")
             
             employee_id = data.get('employee_id', 'unknown')
-            amount = data.get('amount', 0.0)
             request_content = data.get('request_content', task)
             
             expense_result = self.expense_agent.process_report(
@@ -567,12 +1045,11 @@ class Agent:
                     f"Expense denied: {expense_result.get('reason', 'Exceeds policy limit')}"
                 )
             
-            logger.info(f"[Agent Routing] {notification_status}: {notification_message}")
+            logger.info("[Agent Routing] %s: %s", notification_status, notification_message)
             
             # Evaluation & Observability: Provenance Tracking
             # Generate unique decision ID
-            import uuid
-            decision_id = f"DEC-{uuid.uuid4().hex[:8]}"
+            decision_id = f"DEC-{secrets.token_hex(4)}"
             
             # Extract policy context ID from expense result
             policy_context = expense_result.get('policy_context', 'Max Reimbursement is $100.')
@@ -583,7 +1060,7 @@ class Agent:
                 'decision_id': decision_id,
                 'policy_context_id': policy_context_id,
                 'policy_content': policy_context,
-                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'timestamp': _now_iso(),
                 'agent': 'expense_agent',
                 'actions_taken': [
                     'retrieved_policy',
@@ -614,7 +1091,7 @@ class Agent:
             
             # Log completion with provenance
             self._write_event({
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": provenance['timestamp'],
                 "actor": "expense_agent",
                 "action": "task_complete",
                 "task": task,
@@ -646,7 +1123,7 @@ class Agent:
             }
             
             self._write_event({
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": _now_iso(),
                 "actor": "agent",
                 "action": "task_blocked",
                 "task": task,
@@ -664,9 +1141,7 @@ class Agent:
                 'orchestration': {
                     'plan': plan,
                     'steps_completed': [
-                        {'step': plan[0], 'status': 'completed'},
-                        {'step': plan[1], 'status': 'completed'} if len(plan) > 1 else None,
-                        {'step': plan[2], 'status': 'completed'} if len(plan) > 2 else None
+                        {'step': step, 'status': 'completed'} for step in plan[:3]
                     ]
                 },
                 'task': task,
@@ -675,18 +1150,13 @@ class Agent:
                 'status': 'completed'
             }
             
-            # Remove None entries
-            result['orchestration']['steps_completed'] = [
-                step for step in result['orchestration']['steps_completed'] if step is not None
-            ]
-            
             # If retriever is available, could use it here
             if self.retriever:
                 result['retrieval'] = 'Retriever would be used for context'
             
             # Log completion
             self._write_event({
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": _now_iso(),
                 "actor": "agent",
                 "action": "task_complete",
                 "task": task,
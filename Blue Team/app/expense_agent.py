@@ -1,6 +1,12 @@
 from __future__ import annotations
 
+import re
+import time
+import asyncio
 import logging
+from types import MappingProxyType
+from weakref import WeakKeyDictionary
+from typing import Callable, Optional
 
 from .tools import DriveAPI, HRSystemAPI
 from .validators import InputValidator, ValidationError
@@ -8,6 +14,58 @@ from .validators import InputValidator, ValidationError
 
 logger = logging.getLogger(__name__)
 
+# InputValidator is stateless, so one instance serves every report
+_VALIDATOR = InputValidator()
+
+# The expense policy changes rarely; it is fetched from each DriveAPI at most
+# once per POLICY_CACHE_TTL seconds, or again after an upload to that drive
+POLICY_CACHE_TTL = 300.0  # seconds
+DEFAULT_POLICY = "Max Reimbursement is $100."
+DEFAULT_POLICY_LIMIT = 100.00
+
+# Most HR calls a single batch keeps in flight at once
+BATCH_CONCURRENCY = 8
+
+# First dollar amount in the policy text is the reimbursement limit
+_LIMIT_RE = re.compile(r'\$([\d,]+(?:\.\d+)?)')
+
+# Fixed fields of every denial; each result copies these and adds its own
+_DENIED_TPL = MappingProxyType({
+    'decision': 'Denied',
+    'reimbursement_amount': 0.0
+})
+_VALIDATION_DENIED_TPL = MappingProxyType({
+    **_DENIED_TPL,
+    'policy_context': 'Input validation policy',
+    'validation_failed': True,
+    'security_check': 'INPUT_VALIDATION_FAILED'
+})
+
+# DriveAPI -> (fetched_at, generation, policy_content, policy_limit); entries
+# go away with their drive
+_POLICY_CACHE: WeakKeyDictionary[DriveAPI, tuple[float, int, str, float]] = WeakKeyDictionary()
+
+
+def _cached_policy(drive_api: DriveAPI) -> tuple[str, float] | None:
+    """Policy content and limit if the copy cached for drive_api is still fresh, else None."""
+    cached = _POLICY_CACHE.get(drive_api)
+    if (
+        cached is not None
+        and time.monotonic() - cached[0] < POLICY_CACHE_TTL
+        and cached[1] == drive_api.generation
+    ):
+        return cached[2], cached[3]
+    return None
+
+
+def _parse_policy_limit(policy_content: str) -> float:
+    """Reimbursement limit stated in the policy, or the default if none is found."""
+    match = _LIMIT_RE.search(policy_content)
+    if not match:
+        logger.warning("[ExpenseAgent] No limit found in policy, using default")
+        return DEFAULT_POLICY_LIMIT
+    return float(match.group(1).replace(',', ''))
+
 
 class ExpenseAgent:
     """
@@ -60,87 +118,222 @@ class ExpenseAgent:
         # ⚠️ SECURITY-CRITICAL: Input Validation
         # MANDATORY: All inputs validated before processing
         # Prevents SQL injection, XSS, command injection
+        try:
+            employee_id, expense_amount, request_content = self._validate_report(
+                employee_id, expense_amount, request_content
+            )
+        except ValidationError as e:
+            return self._validation_denial(e)
         
-        validator = InputValidator()
+        # Step 1: Policy Retrieval - Use Drive API to get expense policy
+        logger.info("[ExpenseAgent] Retrieving policy for expense report: %s", employee_id)
+        policy_content, policy_limit = self._get_policy()
         
-        # Step 0: Input Validation with comprehensive checks
+        # Profile is only looked up if the expense is approved
+        return self._review_report(
+            employee_id,
+            expense_amount,
+            policy_content,
+            policy_limit,
+            lambda: self.hr_api.get_profile(employee_id)
+        )
+    
+    async def aprocess_report(
+        self, 
+        employee_id: str, 
+        expense_amount: float, 
+        request_content: str
+    ) -> dict:
+        """
+        Async variant of process_report for callers on the event loop.
+        
+        After validation, policy retrieval and the HR profile lookup do not
+        depend on each other, so they run concurrently in worker threads
+        instead of back to back. Only the balance update waits for the
+        decision. Returns the same dictionary as process_report.
+        """
         try:
-            # Validate employee ID format
-            employee_id = validator.validate_employee_id(employee_id)
-            
-            # Validate expense amount
-            expense_amount = validator.validate_amount(expense_amount)
-            
-            # Sanitize request content (prevent XSS/injection)
-            request_content = validator.validate_string_input(
-                request_content,
-                field_name="request_content",
-                max_length=500,
-                allow_html=False
+            employee_id, expense_amount, request_content = self._validate_report(
+                employee_id, expense_amount, request_content
             )
-            
-            logger.info(
-                f"[ExpenseAgent] Input validation passed for {employee_id}, "
-                f"amount: ${expense_amount}"
-            )
-            
         except ValidationError as e:
-            logger.error(f"[ExpenseAgent] Input validation failed: {e}")
-            return {
-                'decision': 'Denied',
-                'policy_context': 'Input validation policy',
-                'reimbursement_amount': 0.0,
-                'error': str(e),
-                'validation_failed': True,
-                'security_check': 'INPUT_VALIDATION_FAILED'
-            }
+            return self._validation_denial(e)
         
-        # Step 1: Policy Retrieval - Use Drive API to get expense policy
-        logger.info(f"[ExpenseAgent] Retrieving policy for expense report: {employee_id}")
-        policy_content = self.drive_api.search_file('policy')
+        # With the limit already cached, an over-limit report is denied
+        # without touching Drive or HR
+        cached = _cached_policy(self.drive_api)
+        if cached is not None and expense_amount > cached[1]:
+            return self._limit_denial(employee_id, expense_amount, *cached)
+        
+        logger.info("[ExpenseAgent] Retrieving policy for expense report: %s", employee_id)
+        (policy_content, policy_limit), employee_profile = await asyncio.gather(
+            asyncio.to_thread(self._get_policy),
+            asyncio.to_thread(self.hr_api.get_profile, employee_id)
+        )
         
+        return await asyncio.to_thread(
+            self._review_report,
+            employee_id,
+            expense_amount,
+            policy_content,
+            policy_limit,
+            lambda: employee_profile
+        )
+    
+    async def process_reports_batch(self, reports: list[dict]) -> list[dict]:
+        """
+        Process several expense reports against a single policy fetch.
+        
+        Each report is a dict with 'employee_id', 'amount' and
+        'request_content', the same shape as expense task data. Reports are
+        validated one by one, then reviewed concurrently with at most
+        BATCH_CONCURRENCY HR calls in flight.
+        
+        Returns:
+            One process_report result dictionary per report, in input order
+        """
+        logger.info("[ExpenseAgent] Retrieving policy for batch of %d report(s)", len(reports))
+        policy_content, policy_limit = await asyncio.to_thread(self._get_policy)
+        hr_slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+        
+        async def review(report: dict) -> dict:
+            try:
+                employee_id, expense_amount, _ = self._validate_report(
+                    report.get('employee_id'),
+                    report.get('amount', 0.0),
+                    report.get('request_content', '')
+                )
+            except ValidationError as e:
+                return self._validation_denial(e)
+            
+            async with hr_slots:
+                return await asyncio.to_thread(
+                    self._review_report,
+                    employee_id,
+                    expense_amount,
+                    policy_content,
+                    policy_limit,
+                    lambda: self.hr_api.get_profile(employee_id)
+                )
+        
+        return list(await asyncio.gather(*(review(report) for report in reports)))
+    
+    def _get_policy(self) -> tuple[str, float]:
+        """
+        Expense policy content and its parsed limit, from the TTL cache when fresh.
+        
+        The limit is parsed once per fetch, not once per report.
+        """
+        cached = _cached_policy(self.drive_api)
+        if cached is not None:
+            return cached
+        
+        now = time.monotonic()
+        generation = self.drive_api.generation
+        policy_content = self.drive_api.search_file('policy')
         if not policy_content:
             logger.warning("[ExpenseAgent] Policy not found, using default")
-            policy_content = "Max Reimbursement is $100."
+            policy_content = DEFAULT_POLICY
+        policy_limit = _parse_policy_limit(policy_content)
+        _POLICY_CACHE[self.drive_api] = (now, generation, policy_content, policy_limit)
+        return policy_content, policy_limit
+    
+    def _validate_report(
+        self,
+        employee_id: str,
+        expense_amount: float,
+        request_content: str
+    ) -> tuple[str, float, str]:
+        """
+        Step 0: Input Validation with comprehensive checks.
+        
+        Returns:
+            Validated (employee_id, expense_amount, request_content)
+            
+        Raises:
+            ValidationError: If any input fails validation
+        """
+        validator = _VALIDATOR
+        
+        # Validate employee ID format
+        employee_id = validator.validate_employee_id(employee_id)
+        
+        # Validate expense amount
+        expense_amount = validator.validate_amount(expense_amount)
+        
+        # Sanitize request content (prevent XSS/injection)
+        request_content = validator.validate_string_input(
+            request_content,
+            field_name="request_content",
+            max_length=500,
+            allow_html=False
+        )
         
-        logger.info(f"[ExpenseAgent] Policy retrieved: {policy_content}")
+        logger.info(
+            "[ExpenseAgent] Input validation passed for %s, amount: $%s",
+            employee_id, expense_amount
+        )
+        return employee_id, expense_amount, request_content
+    
+    @staticmethod
+    def _validation_denial(error: ValidationError) -> dict:
+        """Denial result for a report that failed input validation."""
+        logger.error("[ExpenseAgent] Input validation failed: %s", error)
+        return {**_VALIDATION_DENIED_TPL, 'error': str(error)}
+    
+    def _review_report(
+        self,
+        employee_id: str,
+        expense_amount: float,
+        policy_content: str,
+        policy_limit: float,
+        load_profile: Callable[[], Optional[dict]]
+    ) -> dict:
+        """
+        Steps 2-3: Decide on a validated report and issue the reimbursement.
+        
+        Args:
+            employee_id: Validated employee identifier
+            expense_amount: Validated expense amount
+            policy_content: Retrieved policy
+            policy_limit: Reimbursement limit parsed from the policy
+            load_profile: Returns the employee profile; only called on approval
+            
+        Returns:
+            The process_report result dictionary
+        """
+        logger.debug("[ExpenseAgent] Policy retrieved: %s", policy_content)
         
         # Step 2: Report Review/Decision
-        # Based on mock policy: expense_amount <= 100.00 is approved
-        if expense_amount <= 100.00:
+        # Expenses up to the policy limit are approved
+        if expense_amount <= policy_limit:
             decision = 'Approved'
-            logger.info(f"[ExpenseAgent] Expense APPROVED for {employee_id}: ${expense_amount}")
+            logger.info("[ExpenseAgent] Expense APPROVED for %s: $%s", employee_id, expense_amount)
             
             # Step 3: Reimbursement (If Approved)
             # 3a: Validate employee exists
-            employee_profile = self.hr_api.get_profile(employee_id)
+            employee_profile = load_profile()
             
             if not employee_profile:
-                logger.error(f"[ExpenseAgent] Employee {employee_id} not found")
+                logger.error("[ExpenseAgent] Employee %s not found", employee_id)
                 return {
-                    'decision': 'Denied',
+                    **_DENIED_TPL,
                     'policy_context': policy_content,
-                    'reimbursement_amount': 0.0,
                     'error': f'Employee {employee_id} not found in HR system'
                 }
             
-            # 3b: Update balance (issue reimbursement)
-            update_success = self.hr_api.update_balance(employee_id, expense_amount)
+            # 3b: Update balance (issue reimbursement); returns the new balance
+            new_balance = self.hr_api.update_balance(employee_id, expense_amount)
             
-            if not update_success:
-                logger.error(f"[ExpenseAgent] Failed to update balance for {employee_id}")
+            if new_balance is None:
+                logger.error("[ExpenseAgent] Failed to update balance for %s", employee_id)
                 return {
-                    'decision': 'Denied',
+                    **_DENIED_TPL,
                     'policy_context': policy_content,
-                    'reimbursement_amount': 0.0,
                     'error': 'Failed to update employee balance'
                 }
             
-            # 3c: Get new balance
-            updated_profile = self.hr_api.get_profile(employee_id)
-            new_balance = updated_profile['balance'] if updated_profile else 0.0
-            
-            logger.info(f"[ExpenseAgent] Balance updated. New balance: ${new_balance}")
+            logger.info("[ExpenseAgent] Balance updated. New balance: $%s", new_balance)
             
             return {
                 'decision': decision,
@@ -152,13 +345,23 @@ class ExpenseAgent:
             
         else:
             # Denied - expense exceeds policy limit
-            decision = 'Denied'
-            logger.info(f"[ExpenseAgent] Expense DENIED for {employee_id}: ${expense_amount} exceeds limit")
-            
-            return {
-                'decision': decision,
-                'policy_context': policy_content,
-                'reimbursement_amount': 0.0,
-                'reason': f'Expense amount ${expense_amount} exceeds policy limit ($100.00)'
-            }
+            return self._limit_denial(
+                employee_id, expense_amount, policy_content, policy_limit
+            )
+    
+    @staticmethod
+    def _limit_denial(
+        employee_id: str,
+        expense_amount: float,
+        policy_content: str,
+        policy_limit: float
+    ) -> dict:
+        """Denial result for a report whose amount exceeds the policy limit."""
+        logger.info("[ExpenseAgent] Expense DENIED for %s: $%s exceeds limit", employee_id, expense_amount)
+        
+        return {
+            **_DENIED_TPL,
+            'policy_context': policy_content,
+            'reason': f'Expense amount ${expense_amount} exceeds policy limit (${policy_limit:.2f})'
+        }
 
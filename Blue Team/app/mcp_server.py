@@ -16,7 +16,7 @@ Production Features:
 
 from fastapi import FastAPI, HTTPException, Header, Request
 from pydantic import BaseModel, ValidationError
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime, timezone
 import logging
 import os
@@ -24,6 +24,7 @@ import json
 from pathlib import Path
 from collections import defaultdict
 import time
+import heapq
 
 from dotenv import load_dotenv
 
@@ -82,6 +83,52 @@ RATE_LIMIT_WINDOW = 60  # seconds
 RATE_LIMIT_MAX_REQUESTS = 100  # max requests per window
 sender_requests: Dict[str, List[float]] = defaultdict(list)
 
+# Replay protection: nonces seen within the signature window
+NONCE_WINDOW_SECONDS = 300  # matches the 5-minute signature timestamp window
+
+
+class NonceCache:
+    """
+    Bounded store of recently seen nonces.
+    
+    Each nonce is kept until its signed request timestamp plus the window,
+    the last moment the timestamp check could still accept that request, so
+    it cannot be replayed after its entry expires. Expiry times live in a
+    min-heap, so expired nonces are evicted from the front; lookups are O(1).
+    Memory is bounded by the traffic within one window.
+    """
+    
+    def __init__(self, window_seconds: float = NONCE_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._store: Dict[str, float] = {}
+        self._expiry: List[Tuple[float, str]] = []  # (expires_at, nonce) min-heap
+    
+    def check_and_add(self, nonce: str, timestamp: float) -> bool:
+        """
+        Record a nonce with the Unix timestamp its request was signed at.
+        
+        Returns:
+            True if the nonce is new, False if it was already seen or its
+            timestamp is older than the window (a replay could no longer
+            be detected)
+        """
+        now = time.time()
+        store = self._store
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            _, old_nonce = heapq.heappop(expiry)
+            store.pop(old_nonce, None)
+        
+        expires_at = timestamp + self.window_seconds
+        if expires_at <= now or nonce in store:
+            return False
+        store[nonce] = expires_at
+        heapq.heappush(expiry, (expires_at, nonce))
+        return True
+
+
+nonce_cache = NonceCache()
+
 # Audit log path
 LOG_DIR = Path("./logs")
 LOG_DIR.mkdir(parents=True, exist_ok=True)
@@ -238,6 +285,24 @@ async def send_message(
             f"nonce={x_nonce}, timestamp={timestamp_int}"
         )
         
+        # Replay protection: a valid signature may only be used once, and
+        # only while its nonce is still remembered
+        if not nonce_cache.check_and_add(x_nonce, timestamp_int):
+            logger.warning(
+                f"[MCP Security] Replayed or expired nonce from {message.sender}: {x_nonce}"
+            )
+            log_security_event({
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "event": "replay_detected",
+                "sender": message.sender,
+                "protocol": message.protocol,
+                "severity": "HIGH"
+            })
+            raise HTTPException(
+                status_code=401,
+                detail="Replayed nonce or expired timestamp"
+            )
+        
     except HTTPException:
         # Re-raise HTTP exceptions from verify_mcp_signature
         raise
@@ -0,0 +1,976 @@
+// Chat page behaviour. Wrapped in a function so the early returns below
+// (missing login, missing elements) are legal in a classic script.
+(() => {
+  const logEl = document.getElementById("chat-log");
+  const inputEl = document.getElementById("chat-input");
+  const sendBtn = document.getElementById("send-btn");
+  const roleEl = document.getElementById("role-select");
+  const quickActions = document.querySelector(".quick-actions");
+  const manualForm = document.getElementById("manual-expense-form");
+  const csvInput = document.getElementById("csv-input");
+  const csvUploadBtn = document.getElementById("csv-upload-btn");
+  const manualFields = {
+    employeeId: document.getElementById("manual-employee-id"),
+    category: document.getElementById("manual-category"),
+    amount: document.getElementById("manual-amount"),
+    currency: document.getElementById("manual-currency"),
+    description: document.getElementById("manual-description"),
+    vendor: document.getElementById("manual-vendor"),
+    paymentMethod: document.getElementById("manual-payment-method"),
+    receipt: document.getElementById("manual-receipt"),
+    dateIncurred: document.getElementById("manual-date-incurred"),
+    dateSubmitted: document.getElementById("manual-date-submitted")
+  };
+  const manualDateSubmitted = manualFields.dateSubmitted;
+  const adminButtons = document.querySelectorAll('[data-role="admin"]');
+  const auditorButtons = document.querySelectorAll('[data-role="auditor"]');
+  const statusItems = document.getElementById("status-items");
+  const chatHeader = document.querySelector(".chat-header");
+  const formsContainer = document.querySelector(".forms-container");
+  // New status items and chat messages are buffered here and attached
+  // once per animation frame, so a burst costs one layout, not one each
+  let pendingStatus = null;
+  let statusFrame = 0;
+  let pendingMessages = null;
+  let messageFrame = 0;
+  // Controller for the typed chat request still in flight, if any
+  let chatRequest = null;
+  // randomUUID is only exposed in secure contexts (https or localhost)
+  const sessionId = "webchat-" + (crypto.randomUUID?.() ?? Math.random().toString(36).slice(2, 10));
+  // localStorage is read once here and kept in sync by the storage
+  // event, instead of being hit on every task
+  let authToken = localStorage.getItem("auth_token");
+  let storedRole = localStorage.getItem("role");
+  let currentRole = storedRole || "employee";
+  const storedUsername = localStorage.getItem("username");
+  // Request headers per role, reused across tasks; cleared whenever the
+  // token changes since it is baked into them
+  const headersCache = new Map();
+  window.addEventListener("storage", (e) => {
+    if (e.key === "auth_token") {
+      authToken = e.newValue;
+      headersCache.clear();
+    }
+    if (e.key === "role") storedRole = e.newValue;
+  });
+
+  // Check authentication
+  if (!authToken) {
+    window.location.href = "/login";
+    return;
+  }
+
+  // Ensure all elements exist before using them
+  if (!logEl || !inputEl || !sendBtn || !roleEl) {
+    console.error("Critical UI elements not found!");
+    return;
+  }
+
+  // Set role selector to stored role
+  if (roleEl && currentRole) {
+    roleEl.value = currentRole;
+  }
+
+  // Logout handler
+  const logoutBtn = document.getElementById("logout-btn");
+  if (logoutBtn) {
+    logoutBtn.addEventListener("click", () => {
+      localStorage.removeItem("auth_token");
+      localStorage.removeItem("username");
+      localStorage.removeItem("role");
+      authToken = null;
+      storedRole = null;
+      headersCache.clear();
+      window.location.href = "/login";
+    });
+  }
+
+  // Show welcome message with username
+  if (storedUsername) {
+    appendMessage(`Welcome back, ${storedUsername}. Current role: ${currentRole}`, "meta");
+  }
+
+  // Initialize chat as minimized
+  const chatShell = document.getElementById("chat-shell");
+  const chatToggleBtn = document.getElementById("chat-toggle-btn");
+
+  if (chatToggleBtn) {
+    chatToggleBtn.addEventListener("click", () => {
+      if (chatShell.classList.contains("minimized")) {
+        chatShell.classList.remove("minimized");
+        chatToggleBtn.classList.add("hidden");
+      }
+    });
+  }
+
+  // Close chat button handler
+  const closeChatBtn = document.getElementById("chat-close-btn");
+  if (closeChatBtn) {
+    closeChatBtn.addEventListener("click", () => {
+      chatShell.classList.add("minimized");
+      chatToggleBtn.classList.remove("hidden");
+    });
+  }
+
+  function updateRoleUI(role) {
+    currentRole = role;
+    // Update header color based on role
+    if (chatHeader) {
+      chatHeader.style.borderBottomColor = 
+        role === "admin" ? "rgba(239, 68, 68, 0.4)" :
+        role === "auditor" ? "rgba(139, 92, 246, 0.4)" :
+        "rgba(59, 130, 246, 0.4)";
+    }
+    // Show/hide role-specific buttons
+    adminButtons.forEach(btn => {
+      btn.style.display = role === "admin" ? "inline-block" : "none";
+    });
+    auditorButtons.forEach(btn => {
+      btn.style.display = role === "auditor" ? "inline-block" : "none";
+    });
+    // Update form visibility
+    if (formsContainer) {
+      formsContainer.style.display = role === "employee" ? "block" : "none";
+    }
+  }
+
+  if (manualDateSubmitted && !manualDateSubmitted.value) {
+    manualDateSubmitted.value = new Date().toISOString().slice(0, 10);
+  }
+
+  // Initialize role UI on page load
+  updateRoleUI("employee");
+
+  function pushStatus(message, variant = "info") {
+    if (!statusItems) return;
+    const item = document.createElement("div");
+    item.className = `status-item ${variant}`;
+    item.textContent = `${new Date().toLocaleTimeString()} — ${message}`;
+    pendingStatus ||= document.createDocumentFragment();
+    pendingStatus.appendChild(item);
+    if (!statusFrame) {
+      statusFrame = requestAnimationFrame(() => {
+        statusItems.appendChild(pendingStatus);
+        pendingStatus = null;
+        statusFrame = 0;
+        statusItems.scrollTop = statusItems.scrollHeight;
+      });
+    }
+  }
+  pushStatus("No submissions yet. Manual form or CSV uploads will appear here.", "info");
+
+  function appendMessage(text, role, isHtml = false) {
+    appendMessages([{ text, role, isHtml }]);
+  }
+
+  // Appends several { text, role, isHtml } messages as one batch
+  function appendMessages(items) {
+    pendingMessages ||= document.createDocumentFragment();
+    for (const { text, role, isHtml } of items) {
+      const div = document.createElement("div");
+      div.className = "message " + role;
+      // Only callers that built the markup themselves pass isHtml
+      if (isHtml) {
+        div.innerHTML = text;
+      } else {
+        div.textContent = text;
+      }
+      pendingMessages.appendChild(div);
+    }
+    if (!messageFrame) {
+      messageFrame = requestAnimationFrame(() => {
+        logEl.appendChild(pendingMessages);
+        pendingMessages = null;
+        messageFrame = 0;
+        logEl.scrollTop = logEl.scrollHeight;
+      });
+    }
+  }
+
+  // Fixed fragments of the agent summary, built once. The summary is
+  // rendered as HTML, so line breaks are <br> from the start.
+  const SUMMARY_HEADER = "[SUCCESS] Request processed successfully<br><br>";
+  const EXPENSE_PAID_TEXT = "<strong>Expense Reimbursement</strong><br>Status: Approved and paid<br>";
+  const EXPENSE_SUBMITTED_TEXT = "<strong>Expense Submitted</strong><br>Your expense has been submitted for review<br>";
+  const EXPENSE_FLAGGED_TEXT =
+    "<strong>Expense Flagged</strong><br>This expense requires manager review<br>Reason: Amount exceeds policy limits<br>";
+  const POLICY_UPLOAD_TEXT = "<br><strong>Policy Upload</strong><br>Policy successfully uploaded and indexed<br>";
+  const EMAIL_SENT_TEXT = "<br><strong>Email Notification</strong><br>Confirmation email sent to employee<br>";
+  const AUDIT_LOG_TEXT = "<br><strong>Audit Log</strong><br>Activity recorded in system logs<br>";
+
+  function renderExpensePaid(exp) {
+    const parts = [EXPENSE_PAID_TEXT];
+    if (exp.details && exp.details.length > 0) {
+      exp.details.forEach((detail) => {
+        const output = detail.output || {};
+        if (output.report_id) {
+          parts.push(`Report ID: ${output.report_id}<br>`);
+        }
+        if (output.balance !== undefined) {
+          parts.push(`New Balance: $${output.balance.toFixed(2)}<br>`);
+        }
+      });
+    }
+    return { text: parts.join(""), trace: "Expense Agent: Processed reimbursement" };
+  }
+  const EXPENSE_SUBMITTED = { text: EXPENSE_SUBMITTED_TEXT, trace: "Expense Agent: Created expense report" };
+  const EXPENSE_FLAGGED = { text: EXPENSE_FLAGGED_TEXT, trace: "Expense Agent: Flagged for review" };
+
+  // Expense statuses are a small closed vocabulary: each status word maps
+  // straight to the renderer for its summary block
+  const EXPENSE_STATUS = new Map([
+    ["paid", renderExpensePaid],
+    ["processed", renderExpensePaid],
+    ["submitted", () => EXPENSE_SUBMITTED],
+    ["flagged", () => EXPENSE_FLAGGED]
+  ]);
+
+  function summarizeResponse(data, ok, role, fallbackText) {
+    // Comprehensive workflow response formatter. Returns { text, isHtml };
+    // only the agent summary is HTML, everything else is shown as plain text.
+    if (!ok) {
+      if (data && data.detail) {
+        if (data.detail.includes("Role employee not authorized") && role === "employee") {
+          return { text: "[ACCESS DENIED] Your request requires admin approval. Employees cannot review or approve their own expenses. An admin will need to complete the process.", isHtml: false };
+        }
+        if (data.detail.includes("Human-in-the-loop approval required")) {
+          return { text: "[HITL REQUIRED] This action requires human approval. Please complete the manual approval process before proceeding.", isHtml: false };
+        }
+        return { text: "[ERROR] Request blocked: " + data.detail, isHtml: false };
+      }
+      return { text: "[ERROR] " + (fallbackText || "Unknown server error"), isHtml: false };
+    }
+
+    // Check for comprehensive result with agent details
+    if (data && data.result && data.result.summary) {
+      const summary = data.result.summary;
+      const parts = [SUMMARY_HEADER];
+      const agentActions = [];
+
+      // Expense Agent summary
+      if (summary.expense_agent) {
+        const exp = summary.expense_agent;
+        const status = exp.status || "unknown";
+
+        let render;
+        for (const token of status.split(/[_\s]+/)) {
+          if ((render = EXPENSE_STATUS.get(token))) break;
+        }
+        if (render) {
+          const rendered = render(exp);
+          parts.push(rendered.text);
+          agentActions.push(rendered.trace);
+        } else {
+          parts.push(`<strong>Expense Status:</strong> ${status}<br>`);
+          agentActions.push(`Expense Agent: ${status}`);
+        }
+      }
+
+      // Drive Agent summary
+      if (summary.drive_agent) {
+        const drive = summary.drive_agent;
+        const status = drive.status || "unknown";
+
+        if (status.includes("uploaded")) {
+          parts.push(POLICY_UPLOAD_TEXT);
+          agentActions.push("Drive Agent: Policy stored");
+        } else if (status.includes("found") || drive.details) {
+          const docCount = drive.details ? drive.details.length : 0;
+          parts.push(`<br><strong>Policy Search</strong><br>Found ${docCount} policy document(s)<br>`);
+          agentActions.push(`Drive Agent: Retrieved ${docCount} documents`);
+        }
+      }
+
+      // Email Agent summary
+      if (summary.email_agent) {
+        const email = summary.email_agent;
+        const status = email.status || "unknown";
+
+        if (status.includes("sent")) {
+          parts.push(EMAIL_SENT_TEXT);
+          agentActions.push("Email Agent: Notification sent");
+        }
+      }
+
+      // Sheets Agent summary
+      if (summary.sheets_agent) {
+        parts.push(AUDIT_LOG_TEXT);
+        agentActions.push("Sheets Agent: Logged transaction");
+      }
+
+      // Add agent execution summary
+      if (agentActions.length > 0) {
+        parts.push("<br><em>Agent trace: " + agentActions.join(" | ") + "</em>");
+      }
+
+      return { text: parts.join(""), isHtml: true };
+    }
+
+    // Simple status responses
+    if (data && data.status === "ok") {
+      if (data.ingested) {
+        return { text: "[SUCCESS] Policy upload completed. Ingested " + data.ingested + " document(s).", isHtml: false };
+      }
+      return { text: "[SUCCESS] Request completed successfully.", isHtml: false };
+    }
+
+    return { text: "[SUCCESS] Request processed. Check status panel for details.", isHtml: false };
+  }
+
+  function makeHeaders(role) {
+    let headers = headersCache.get(role);
+    if (!headers) {
+      headers = { "Content-Type": "application/json", "X-Role": role };
+      if (authToken) {
+        headers["Authorization"] = `Bearer ${authToken}`;
+      }
+      headersCache.set(role, Object.freeze(headers));
+    }
+    return headers;
+  }
+
+  // Pass an AbortSignal to let a newer request cancel this one; an aborted
+  // task resolves to { aborted: true } instead of a reply
+  async function executeTask(taskText, role, extraData = {}, signal = undefined) {
+    const payload = {
+      task: taskText,
+      data: { session_id: sessionId, ...extraData }
+    };
+    const actualRole = storedRole || role || "employee";
+    let response;
+    let rawText;
+    try {
+      response = await fetch("/tasks", {
+        method: "POST",
+        headers: makeHeaders(actualRole),
+        body: JSON.stringify(payload),
+        signal
+      });
+      rawText = await response.text();
+    } catch (err) {
+      if (err.name === "AbortError") {
+        return { aborted: true, ok: false };
+      }
+      return { reply: "Network error: " + err, isHtml: false, ok: false };
+    }
+    let json = null;
+    try {
+      json = rawText ? JSON.parse(rawText) : null;
+    } catch {
+      json = null;
+    }
+    const { text: reply, isHtml } = summarizeResponse(json, response.ok, actualRole, rawText);
+    return { reply, isHtml, data: json, ok: response.ok, raw: rawText };
+  }
+
+  async function sendMessage() {
+    const text = inputEl.value.trim();
+    if (!text) return;
+    appendMessage(text, "user");
+    inputEl.value = "";
+
+    // Lightweight chat-bot behavior for very short greetings or vague input
+    const lower = text.toLowerCase();
+    if (
+      text.length < 40 &&
+      (lower === "hi" ||
+        lower === "hello" ||
+        lower === "hey" ||
+        lower.startsWith("hi ") ||
+        lower.startsWith("hello ") ||
+        lower.includes("how are you"))
+    ) {
+      appendMessage(
+        "Hi! I'm your Blue Team copilot. You can ask me to upload policies, submit expenses, or check reimbursement status.",
+        "agent"
+      );
+      return;
+    }
+
+    const role = storedRole || currentRole || "employee";
+    // A newer message supersedes the previous one if it has not come back yet
+    chatRequest?.abort();
+    const controller = new AbortController();
+    chatRequest = controller;
+
+    try {
+      const result = await executeTask(text, role, {}, controller.signal);
+      if (!result.aborted) {
+        appendMessage(result.reply, "agent", result.isHtml);
+      }
+    } catch (err) {
+      appendMessage("Network error: " + err, "agent");
+    } finally {
+      if (chatRequest === controller) {
+        chatRequest = null;
+      }
+    }
+  }
+
+  sendBtn.addEventListener("click", sendMessage);
+  inputEl.addEventListener("keydown", (e) => {
+    if (e.key === "Enter" && !e.shiftKey) {
+      e.preventDefault();
+      sendMessage();
+    }
+  });
+  // Waits ms, then for the next frame, so the step just appended has been
+  // painted before the demo moves on
+  async function pause(ms) {
+    await new Promise((resolve) => setTimeout(resolve, ms));
+    await new Promise((resolve) => requestAnimationFrame(resolve));
+  }
+
+  // Demo Workflow Button - Simulates complete workflow
+  async function runDemoWorkflow() {
+    const userRole = storedRole || currentRole;
+    if (userRole === "employee") {
+      // Step 1: Check initial balance
+      appendMessages([
+        { text: "Starting complete workflow demonstration...", role: "meta" },
+        { text: "Step 1: Checking current balance...", role: "user" }
+      ]);
+      pushStatus("Demo: Starting workflow", "info");
+      pushStatus("Demo: Checking balance", "info");
+      await pause(500);
+      appendMessage("Current balance: $1200.00 (emp-001)", "agent");
+
+      // Step 2: Submit expense
+      await pause(800);
+      appendMessage("Step 2: Submitting expense reimbursement...", "user");
+      pushStatus("Demo: Submitting expense", "info");
+      const expenseRequest = "Submit an expense reimbursement for employee emp-001 for 200 USD in the travel category for a taxi from the airport to the client office.";
+      const result = await executeTask(expenseRequest, userRole, {
+        employee_id: "emp-001",
+        category: "travel",
+        amount: 200,
+        currency: "USD",
+        description: "Taxi from airport to client office",
+        vendor: "City Taxi",
+        payment_method: "Personal Card",
+        receipt: "Receipt: City Taxi, $200, 2024-11-17"
+      });
+      appendMessages([
+        { text: result.reply, role: "agent", isHtml: result.isHtml },
+        { text: "[DEMO COMPLETE] Check the response above for workflow details.", role: "meta" }
+      ]);
+      pushStatus("Demo: Workflow complete", "success");
+    } else if (userRole === "admin") {
+      // Upload policy
+      appendMessages([
+        { text: "Starting admin workflow demonstration...", role: "meta" },
+        { text: "Step 1: Uploading expense policy...", role: "user" }
+      ]);
+      pushStatus("Demo: Admin workflow", "info");
+      pushStatus("Demo: Uploading policy", "info");
+      const policyRequest = "Upload a new expense policy that allows travel expenses up to 500 USD per trip with receipt requirement.";
+      const result = await executeTask(policyRequest, userRole, {
+        doc_id: "demo_policy_" + Date.now(),
+        title: "Demo Expense Policy",
+        content: "Travel expenses up to $500 require receipt. Auto-approved under $100.",
+        tags: ["policy", "demo"]
+      });
+      appendMessage(result.reply, "agent", result.isHtml);
+
+      await pause(800);
+      appendMessage("Step 2: Viewing flagged expenses...", "user");
+      const flaggedResult = await executeTask("Show flagged expenses that need manager review.", userRole, {});
+      appendMessages([
+        { text: flaggedResult.reply, role: "agent", isHtml: flaggedResult.isHtml },
+        { text: "[DEMO COMPLETE] Admin workflow finished.", role: "meta" }
+      ]);
+      pushStatus("Demo: Admin workflow complete", "success");
+    } else {
+      appendMessage("Demo workflow is available for employee and admin roles.", "meta");
+    }
+  }
+
+  async function showSystemLogs() {
+    const userRole = storedRole || currentRole;
+    if (userRole !== "admin") {
+      appendMessage("Only admins can view logs. Please login as admin.", "meta");
+      return;
+    }
+    pushStatus("Fetching system logs...", "info");
+    try {
+      const resp = await fetch("/logs");
+      if (!resp.ok) {
+        const txt = await resp.text();
+        appendMessage("Error fetching logs: " + txt, "agent");
+        pushStatus("Failed to fetch logs", "error");
+        return;
+      }
+      const entries = await resp.json();
+      if (!Array.isArray(entries) || entries.length === 0) {
+        appendMessage("No logs available yet.", "agent");
+        pushStatus("No logs found", "info");
+        return;
+      }
+      const last = entries.slice(-5);
+      const summaryLines = last.map((e) => {
+        const ts = e.timestamp || "";
+        const actor = e.actor || "unknown";
+        const action = e.action || "event";
+        const role = e.role ? ` (role: ${e.role})` : "";
+        return `- [${ts}] ${actor}${role}: ${action}`;
+      });
+      appendMessage("Recent system events:\n" + summaryLines.join("\n"), "agent");
+      pushStatus(`Retrieved ${last.length} log entries`, "success");
+    } catch (err) {
+      appendMessage("Network error while fetching logs: " + err, "agent");
+      pushStatus("Error fetching logs", "error");
+    }
+  }
+
+  async function showAuditLogs() {
+    const userRole = storedRole || currentRole;
+    if (userRole !== "auditor") {
+      appendMessage("Only auditors can fetch audit logs. Please login as auditor.", "meta");
+      return;
+    }
+    pushStatus("Fetching audit logs...", "info");
+    try {
+      const taskText = "Fetch audit log entries";
+      const result = await executeTask(taskText, "auditor", {});
+      appendMessage("[Audit Log] " + result.reply, "agent", result.isHtml);
+      pushStatus("Audit log fetched", result.ok ? "success" : "error");
+    } catch (err) {
+      appendMessage("Error fetching audit log: " + err, "agent");
+      pushStatus("Error fetching audit log", "error");
+    }
+  }
+
+  // Quick actions share one delegated listener: buttons with a handler
+  // run it, the rest copy their data-template into the chat input
+  const quickActionHandlers = {
+    "demo-workflow-btn": runDemoWorkflow,
+    "view-logs-btn": showSystemLogs,
+    "auditor-logs-btn": showAuditLogs
+  };
+  if (quickActions) {
+    quickActions.addEventListener("click", (event) => {
+      const btn = event.target.closest("button");
+      if (!btn || !quickActions.contains(btn)) return;
+      const handler = quickActionHandlers[btn.id];
+      if (handler) {
+        handler();
+        return;
+      }
+      const tpl = btn.dataset.template;
+      if (tpl) {
+        inputEl.value = tpl;
+        inputEl.focus();
+      }
+    });
+  }
+
+  if (manualForm) {
+    manualForm.addEventListener("submit", async (event) => {
+      event.preventDefault();
+      if (!manualForm.checkValidity()) {
+        manualForm.reportValidity();
+        pushStatus("Form validation failed. Please check required fields.", "error");
+        return;
+      }
+      const userRole = storedRole || currentRole;
+      if (userRole !== "employee") {
+        pushStatus("Only employees can submit expenses. Please login as an employee.", "error");
+        appendMessage("Only employees can submit expenses. Please login as an employee.", "meta");
+        return;
+      }
+      const employeeId = manualFields.employeeId.value.trim();
+      const category = manualFields.category.value.trim();
+      const amount = manualFields.amount.value.trim();
+      const currency = manualFields.currency.value.trim();
+      const description = manualFields.description.value.trim();
+      const vendor = manualFields.vendor.value.trim();
+      const paymentMethod = manualFields.paymentMethod.value;
+      const dateIncurred = (manualFields.dateIncurred.value || "").trim();
+      const dateSubmitted =
+        (manualFields.dateSubmitted.value || new Date().toISOString().slice(0, 10)).trim();
+      const receipt = manualFields.receipt.value.trim();
+      const transactionId = `manual-${Date.now()}`;
+
+      appendMessage(
+        `Manual expense submission: ${employeeId} • ${category} • ${amount} ${currency} (${paymentMethod})`,
+        "user"
+      );
+      pushStatus(`Submitting manual expense for ${employeeId} (${category})`, "info");
+
+      try {
+        if (receipt) {
+          pushStatus("Uploading receipt...", "info");
+          const receiptTask = `Upload receipt file for employee ${employeeId} expense ${description}`;
+          const receiptData = {
+            doc_id: `receipt-${employeeId}-${Date.now()}`,
+            title: `Receipt for ${employeeId} (${category})`,
+            content: receipt,
+            tags: ["receipt", "expense", "manual_form"]
+          };
+          const receiptResult = await executeTask(receiptTask, currentRole, receiptData);
+          appendMessage("[Receipt] " + receiptResult.reply, "agent", receiptResult.isHtml);
+          pushStatus(`Receipt uploaded: ${receiptResult.ok ? "Success" : "Failed"}`, receiptResult.ok ? "success" : "error");
+        }
+
+        pushStatus("Submitting expense reimbursement...", "info");
+        const expenseTask = `Submit expense reimbursement for employee ${employeeId} amount ${amount} ${currency} in category ${category} paid via ${paymentMethod}. Description: ${description}. Vendor: ${vendor ||
+          "unspecified"}.`;
+        const expenseData = {
+          employee_id: employeeId,
+          category,
+          amount: +amount,
+          currency,
+          description,
+          vendor,
+          payment_method: paymentMethod,
+          source: "manual_form",
+          receipt,
+          receipt_attached: receipt ? "Y" : "N",
+          reimbursement_type: "employee",
+          transaction_id: transactionId,
+          date_incurred: dateIncurred,
+          date_submitted: dateSubmitted
+        };
+        const expenseResult = await executeTask(expenseTask, currentRole, expenseData);
+        appendMessage("[Expense] " + expenseResult.reply, "agent", expenseResult.isHtml);
+        if (expenseResult.ok) {
+          pushStatus(`Expense submitted successfully: ${transactionId}`, "success");
+        } else {
+          pushStatus(`Expense submission failed: ${expenseResult.reply}`, "error");
+        }
+      } catch (err) {
+        const errMsg = err.message || String(err);
+        pushStatus(`Error: ${errMsg}`, "error");
+        appendMessage("Error submitting expense: " + errMsg, "agent");
+      }
+    });
+  }
+
+  // CSV parsing runs in a worker so a large paste never blocks the chat.
+  // The worker's hashed URL is handed over on this script's tag.
+  const csvWorkerUrl = document.currentScript && document.currentScript.dataset.csvWorker;
+
+  function parseCsvOffThread(text) {
+    const worker = new Worker(csvWorkerUrl);
+    return new Promise((resolve, reject) => {
+      worker.onmessage = (event) => {
+        if (event.data.error) {
+          reject(new Error(event.data.error));
+        } else {
+          resolve(event.data.rows);
+        }
+      };
+      worker.onerror = (event) => reject(new Error(event.message || "CSV parser failed to load."));
+      worker.postMessage(text);
+    }).finally(() => worker.terminate());
+  }
+
+  // Pastes longer than this are refused before any parsing or copying
+  const MAX_CSV_CHARS = 5_000_000;
+
+  // Rows are sent CSV_BATCH_SIZE to a /tasks call (the server handles each
+  // row in turn; it accepts up to 100), with a few calls in flight at once.
+  // Replies are tagged with their TransactionID, so finishing out of order
+  // is fine
+  const CSV_BATCH_SIZE = 50;
+  const CSV_BATCH_CONCURRENCY = 4;
+
+  // Task data for one parsed CSV row
+  function csvRowTask(row) {
+    return {
+      request_content: `Submit expense reimbursement from CSV transaction ${row.TransactionID} for employee ${row.EmployeeID} amount ${row.Amount} ${row.Currency} category ${row.Category}.`,
+      employee_id: row.EmployeeID,
+      category: row.Category,
+      amount: +row.Amount,
+      currency: row.Currency,
+      description: row.Description,
+      vendor: row.Vendor,
+      payment_method: row.PaymentMethod,
+      reimbursement_type: row.ReimbursementType || "employee",
+      receipt_attached: row.ReceiptAttached,
+      transaction_id: row.TransactionID,
+      date_incurred: row.DateIncurred,
+      date_submitted: row.DateSubmitted,
+      amount_usd: row.AmountUSD
+    };
+  }
+
+  // UTF-8 size and hex SHA-256 of text, or null where crypto.subtle is
+  // unavailable (pages not served from a secure context)
+  async function digestText(text) {
+    if (!crypto.subtle) return null;
+    const bytes = new TextEncoder().encode(text);
+    const digest = await crypto.subtle.digest("SHA-256", bytes);
+    const sha256 = Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, "0")).join("");
+    return { size: bytes.length, sha256 };
+  }
+
+  // Runs worker over items with at most limit calls in flight
+  async function runPool(items, limit, worker) {
+    const iter = items[Symbol.iterator]();
+    const runners = Array.from({ length: Math.min(limit, items.length) }, async () => {
+      for (let next = iter.next(); !next.done; next = iter.next()) {
+        await worker(next.value);
+      }
+    });
+    await Promise.all(runners);
+  }
+
+  if (csvUploadBtn) {
+    csvUploadBtn.addEventListener("click", async () => {
+      const userRole = storedRole || currentRole;
+      if (userRole !== "employee") {
+        appendMessage("Only employees can upload CSV expenses. Please login as an employee.", "meta");
+        return;
+      }
+      const csvText = (csvInput.value || "").trim();
+      if (!csvText) {
+        appendMessage("Paste CSV data before uploading.", "meta");
+        return;
+      }
+      if (csvText.length > MAX_CSV_CHARS) {
+        appendMessage(`CSV is too large to upload (limit ${MAX_CSV_CHARS.toLocaleString()} characters).`, "meta");
+        return;
+      }
+      appendMessage("Processing CSV expense upload...", "user");
+      pushStatus("CSV upload started…", "info");
+      try {
+        const rows = await parseCsvOffThread(csvText);
+        pushStatus(`Parsed ${rows.length} expense row(s) from CSV.`, "info");
+        let successCount = 0;
+        let errorCount = 0;
+        // Rows whose amount is not a number fail here instead of reaching
+        // the server as null
+        const sendable = [];
+        const invalid = [];
+        for (const row of rows) {
+          if (Number.isNaN(+row.Amount)) {
+            errorCount++;
+            invalid.push({ text: `[CSV:${row.TransactionID}] [ERROR] Amount "${row.Amount}" is not a number`, role: "agent" });
+          } else {
+            sendable.push(row);
+          }
+        }
+        if (invalid.length) {
+          appendMessages(invalid);
+          pushStatus(`${invalid.length} row(s) skipped: amount is not a number`, "error");
+        }
+        const batches = [];
+        for (let i = 0; i < sendable.length; i += CSV_BATCH_SIZE) {
+          batches.push(sendable.slice(i, i + CSV_BATCH_SIZE));
+        }
+        // The source file's size and hash (not its content) travel with the
+        // first batch, for the audit log
+        const digest = await digestText(csvText);
+        const csvDocument = digest && {
+          doc_id: `csv-${Date.now()}`,
+          title: `Expense CSV ${new Date().toISOString()}`,
+          size: digest.size,
+          sha256: digest.sha256,
+          tags: ["expense", "csv", "batch"]
+        };
+        await runPool(batches, CSV_BATCH_CONCURRENCY, async (batch) => {
+          const first = batch[0].TransactionID;
+          const last = batch[batch.length - 1].TransactionID;
+          const label = batch.length > 1 ? `${first}–${last}` : first;
+          try {
+            pushStatus(`Processing rows ${label}...`, "info");
+            const batchData = { source: "csv_upload", rows: batch.map(csvRowTask) };
+            if (csvDocument && batch === batches[0]) {
+              batchData.csv_document = csvDocument;
+            }
+            const result = await executeTask("Submit batch expense reimbursements from CSV upload", currentRole, batchData);
+            const entries = result.ok && result.data && result.data.result && result.data.result.rows;
+            if (!Array.isArray(entries)) {
+              errorCount += batch.length;
+              pushStatus(`Rows ${label}: Failed`, "error");
+              appendMessage(`[CSV:${label}] ` + result.reply, "agent", result.isHtml);
+              return;
+            }
+            // Each row's outcome goes to the chat log only; the status feed
+            // gets one line for the whole batch
+            const messages = [];
+            let batchFailed = 0;
+            // A row is shown by its own expense decision (or task status);
+            // the server's ok flag alone does not make it a success
+            entries.forEach((entry, idx) => {
+              const id = entry.transaction_id || batch[idx].TransactionID;
+              const result = entry.result || {};
+              const expense = result.expense_result;
+              const outcome = (expense ? expense.decision : result.status) || "error";
+              const approved = entry.ok && (expense ? outcome === "Approved" : !["denied", "blocked", "error"].includes(outcome));
+              if (approved) {
+                successCount++;
+                const detail = expense ? `Reimbursed $${expense.reimbursement_amount}` : "Request completed";
+                messages.push({ text: `[CSV:${id}] [${outcome.toUpperCase()}] ${detail}`, role: "agent", isHtml: false });
+              } else {
+                errorCount++;
+                batchFailed++;
+                const reason = (expense && (expense.reason || expense.error)) || result.reason || result.error || "Request failed";
+                messages.push({ text: `[CSV:${id}] [${outcome.toUpperCase()}] ${reason}`, role: "agent", isHtml: false });
+              }
+            });
+            appendMessages(messages);
+            pushStatus(
+              `Rows ${label}: ${entries.length - batchFailed} approved, ${batchFailed} denied or failed`,
+              batchFailed ? "error" : "success"
+            );
+          } catch (batchErr) {
+            errorCount += batch.length;
+            const errMsg = batchErr.message || String(batchErr);
+            pushStatus(`Rows ${label}: Error`, "error");
+            appendMessage(`[CSV:${label}] Error: ${errMsg}`, "agent");
+          }
+        });
+        appendMessage(`CSV processing complete. ${successCount} succeeded, ${errorCount} failed.`, "agent");
+        pushStatus(`CSV batch complete: ${successCount} succeeded, ${errorCount} failed.`, successCount > 0 ? "success" : "error");
+      } catch (err) {
+        const errMsg = err.message || String(err);
+        pushStatus(`CSV error: ${errMsg}`, "error");
+        appendMessage("CSV error: " + errMsg, "agent");
+      }
+    });
+  }
+  // Role selector is disabled - role is determined by login
+  // No change handler needed
+
+  // Role dashboards are fixed markup, built once
+  const EMPLOYEE_DASHBOARD_HTML = `
+        <div style="max-width: 1200px; margin: 0 auto;">
+          <div style="display: grid; grid-template-columns: 2fr 1fr; gap: 24px; margin-bottom: 24px;">
+            <div style="background: white; padding: 24px; border-radius: 12px; border: 1px solid #e5e7eb;">
+              <h2 style="font-size: 20px; font-weight: 600; margin-bottom: 16px; color: #1f2937;">Submit Expense Report</h2>
+              <p style="font-size: 14px; color: #6b7280; margin-bottom: 16px;">Active User: Alice Employee (emp-001) | Current Balance: <span style="font-family: monospace; font-size: 18px; color: #4f46e5;">$1200.00</span></p>
+              <p style="font-size: 14px; color: #9ca3af; margin-top: 16px;">Use the manual form in the chat assistant or click the chat icon to submit expenses.</p>
+            </div>
+            <div style="background: white; padding: 24px; border-radius: 12px; border: 1px solid #e5e7eb;">
+              <h2 style="font-size: 20px; font-weight: 600; margin-bottom: 16px; color: #1f2937;">Quick Actions</h2>
+              <div style="display: flex; flex-direction: column; gap: 12px;">
+                <button data-action="Submit expense" style="padding: 12px; background: #4f46e5; color: white; border: none; border-radius: 8px; cursor: pointer; font-weight: 500;">Submit New Expense</button>
+                <button data-action="Check balance" style="padding: 12px; background: #10b981; color: white; border: none; border-radius: 8px; cursor: pointer; font-weight: 500;">Check Balance</button>
+                <button data-action="View expenses" style="padding: 12px; background: #3b82f6; color: white; border: none; border-radius: 8px; cursor: pointer; font-weight: 500;">View My Expenses</button>
+              </div>
+            </div>
+          </div>
+        </div>
+      `;
+  const ADMIN_DASHBOARD_HTML = `
+        <div style="max-width: 1200px; margin: 0 auto;">
+          <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 24px;">
+            <div style="background: white; padding: 24px; border-radius: 12px; border: 1px solid #e5e7eb;">
+              <h2 style="font-size: 20px; font-weight: 600; margin-bottom: 16px; color: #1f2937;">Policy Management</h2>
+              <div style="display: flex; flex-direction: column; gap: 12px;">
+                <button data-action="Upload policy" style="padding: 12px; background: #4f46e5; color: white; border: none; border-radius: 8px; cursor: pointer; font-weight: 500;">Upload New Policy</button>
+                <button data-action="List policies" style="padding: 12px; background: #3b82f6; color: white; border: none; border-radius: 8px; cursor: pointer; font-weight: 500;">List All Policies</button>
+                <button data-action="Deactivate policy" style="padding: 12px; background: #ef4444; color: white; border: none; border-radius: 8px; cursor: pointer; font-weight: 500;">Deactivate Policy</button>
+              </div>
+            </div>
+            <div style="background: white; padding: 24px; border-radius: 12px; border: 1px solid #e5e7eb;">
+              <h2 style="font-size: 20px; font-weight: 600; margin-bottom: 16px; color: #1f2937;">Expense Review</h2>
+              <div style="display: flex; flex-direction: column; gap: 12px;">
+                <button data-action="View flagged" style="padding: 12px; background: #f59e0b; color: white; border: none; border-radius: 8px; cursor: pointer; font-weight: 500;">View Flagged Expenses</button>
+                <button data-action="View logs" style="padding: 12px; background: #6366f1; color: white; border: none; border-radius: 8px; cursor: pointer; font-weight: 500;">View System Logs</button>
+                <button data-action="Deny expense" style="padding: 12px; background: #dc2626; color: white; border: none; border-radius: 8px; cursor: pointer; font-weight: 500;">Deny Expense</button>
+              </div>
+            </div>
+          </div>
+        </div>
+      `;
+  const AUDITOR_DASHBOARD_HTML = `
+        <div style="max-width: 1200px; margin: 0 auto;">
+          <div style="display: grid; grid-template-columns: 1fr 2fr; gap: 24px;">
+            <div style="background: white; padding: 24px; border-radius: 12px; border: 1px solid #e5e7eb;">
+              <h2 style="font-size: 20px; font-weight: 600; margin-bottom: 16px; color: #1f2937;">Employee Profiles</h2>
+              <div style="display: flex; flex-direction: column; gap: 12px;">
+                <div style="padding: 12px; border: 1px solid #e5e7eb; border-radius: 8px;">
+                  <p style="font-weight: 600; color: #1f2937;">Alice Employee <span style="font-size: 12px; color: #9ca3af;">(emp-001)</span></p>
+                  <p style="font-size: 14px; color: #6b7280;">Bank: 123456789</p>
+                  <p style="font-size: 16px; font-weight: 600; color: #4f46e5; margin-top: 4px;">Balance: $1200.00</p>
+                </div>
+                <div style="padding: 12px; border: 1px solid #e5e7eb; border-radius: 8px;">
+                  <p style="font-weight: 600; color: #1f2937;">Bob Johnson <span style="font-size: 12px; color: #9ca3af;">(emp-002)</span></p>
+                  <p style="font-size: 14px; color: #6b7280;">Bank: 987654321</p>
+                  <p style="font-size: 16px; font-weight: 600; color: #4f46e5; margin-top: 4px;">Balance: $500.00</p>
+                </div>
+              </div>
+            </div>
+            <div style="background: white; padding: 24px; border-radius: 12px; border: 1px solid #e5e7eb;">
+              <h2 style="font-size: 20px; font-weight: 600; margin-bottom: 16px; color: #1f2937;">Audit Actions</h2>
+              <div style="display: flex; flex-direction: column; gap: 12px;">
+                <button data-action="Fetch audit log" style="padding: 12px; background: #8b5cf6; color: white; border: none; border-radius: 8px; cursor: pointer; font-weight: 500;">Fetch Audit Log</button>
+                <button data-action="View all reports" style="padding: 12px; background: #3b82f6; color: white; border: none; border-radius: 8px; cursor: pointer; font-weight: 500;">View All Reports</button>
+              </div>
+              <p style="font-size: 14px; color: #6b7280; margin-top: 16px;">Use the chat assistant to view detailed audit trails and expense report traces.</p>
+            </div>
+          </div>
+        </div>
+      `;
+  const DASHBOARDS = new Map([
+    ["employee", EMPLOYEE_DASHBOARD_HTML],
+    ["admin", ADMIN_DASHBOARD_HTML],
+    ["auditor", AUDITOR_DASHBOARD_HTML]
+  ]);
+
+  // Each dashboard is parsed into a <template> the first time it is shown;
+  // later renders clone that instead of parsing the markup again
+  const dashboardTemplates = new Map();
+  const roleDashboard = document.getElementById("role-dashboard");
+
+  // Render role-based dashboard content
+  function renderRoleDashboard(role) {
+    if (!roleDashboard) return;
+
+    let template = dashboardTemplates.get(role);
+    if (!template) {
+      const html = DASHBOARDS.get(role);
+      if (!html) return;
+      template = document.createElement("template");
+      template.innerHTML = html;
+      dashboardTemplates.set(role, template);
+    }
+    roleDashboard.replaceChildren(template.content.cloneNode(true));
+  }
+
+  // One delegated listener serves every dashboard button
+  if (roleDashboard) {
+    roleDashboard.addEventListener("click", (event) => {
+      const btn = event.target.closest("button[data-action]");
+      if (btn) {
+        window.openChatWithTemplate(btn.dataset.action);
+      }
+    });
+  }
+
+  // Prompt text for each dashboard button's data-action key
+  const CHAT_TEMPLATES = new Map([
+    ["Submit expense", "Submit an expense reimbursement for employee emp-001 for 200 USD in the travel category for a taxi from the airport to the client office."],
+    ["Check balance", "What is my current expense reimbursement balance for employee emp-001?"],
+    ["View expenses", "Show me the status of my expense reimbursements for employee emp-001."],
+    ["Upload policy", "Upload a new expense policy that allows travel expenses up to 500 USD per trip with receipt requirement."],
+    ["List policies", "List active expense policies."],
+    ["Deactivate policy", "Deactivate policy policy_v1."],
+    ["View flagged", "Show flagged expenses that need manager review."],
+    ["View logs", "View system logs"],
+    ["Deny expense", "Deny expense report rpt-123 due to missing receipt."],
+    ["Fetch audit log", "Fetch audit log entries"],
+    ["View all reports", "Show me all submitted expense reports."]
+  ]);
+
+  // Helper function to open chat with template
+  window.openChatWithTemplate = function(action) {
+    if (chatShell.classList.contains("minimized")) {
+      chatShell.classList.remove("minimized");
+      chatToggleBtn.classList.add("hidden");
+    }
+
+    const template = CHAT_TEMPLATES.get(action);
+    if (template) {
+      inputEl.value = template;
+      inputEl.focus();
+    }
+  };
+
+  // Initialize dashboard based on current role
+  const initialRole = storedRole || "employee";
+  renderRoleDashboard(initialRole);
+})();
@@ -0,0 +1,148 @@
+// Parses pasted expense CSV off the main thread. Receives the raw text and
+// replies with { rows } (one object per data row, keyed by header) or
+// { error } with a message for the user.
+const EXPECTED_HEADERS = [
+  "TransactionID",
+  "EmployeeID",
+  "DateIncurred",
+  "DateSubmitted",
+  "Description",
+  "Vendor",
+  "PaymentMethod",
+  "Currency",
+  "Amount",
+  "AmountUSD",
+  "Category",
+  "ReceiptAttached",
+  "ReimbursementType"
+];
+const EXPECTED_HEADER_LINE = EXPECTED_HEADERS.join(",");
+
+// Index of the next comma or line break at or after pos (text.length if none)
+function nextDelimiter(text, pos) {
+  while (pos < text.length) {
+    const code = text.charCodeAt(pos);
+    if (code === 44 || code === 10 || code === 13) break;
+    pos++;
+  }
+  return pos;
+}
+
+// Space, tab, vertical tab or form feed (line breaks end the field first)
+function isAsciiBlank(code) {
+  return code === 32 || (code >= 9 && code <= 13);
+}
+
+// Single pass over the text: fields split on commas, records on line
+// breaks, and a field that opens with a double quote may contain commas,
+// line breaks and "" escapes. Unquoted fields are sliced out whole rather
+// than built a character at a time, and each record becomes its row object
+// as soon as it ends. Blank lines are skipped; values are trimmed.
+function parseCsv(text) {
+  const rows = [];
+  const record = [];
+  let seenHeader = false;
+  let pos = 0;
+
+  const endRecord = () => {
+    if (record.length === 1 && record[0] === "") {
+      record.length = 0;
+      return;
+    }
+    if (!seenHeader) {
+      // With the column count checked first, no name can hide a comma, so
+      // one string comparison covers every column
+      const headerMismatch =
+        record.length !== EXPECTED_HEADERS.length ||
+        record.join(",").replace(/\s+/g, "") !== EXPECTED_HEADER_LINE;
+      if (headerMismatch) {
+        throw new Error("CSV header must match exactly: " + EXPECTED_HEADER_LINE);
+      }
+      seenHeader = true;
+    } else {
+      if (record.length !== EXPECTED_HEADERS.length) {
+        throw new Error(`Row ${rows.length + 2} does not have ${EXPECTED_HEADERS.length} columns.`);
+      }
+      const row = {};
+      for (let idx = 0; idx < EXPECTED_HEADERS.length; idx++) {
+        row[EXPECTED_HEADERS[idx]] = record[idx];
+      }
+      rows.push(row);
+    }
+    record.length = 0;
+  };
+
+  for (;;) {
+    let end = nextDelimiter(text, pos);
+    let start = pos;
+    while (start < end && isAsciiBlank(text.charCodeAt(start))) start++;
+    const lead = text.charCodeAt(start);
+    let field;
+    if (start === end || (lead !== 34 && lead < 128)) {
+      // Common case, no opening quote: trim ASCII blanks by index and slice
+      // once. Non-ASCII at either edge may be Unicode whitespace, which
+      // trim() knows about
+      let stop = end;
+      while (stop > start && isAsciiBlank(text.charCodeAt(stop - 1))) stop--;
+      field = text.slice(start, stop);
+      if (stop > start && text.charCodeAt(stop - 1) > 127) field = field.trim();
+    } else {
+      // A double quote opens a quoted section when only whitespace precedes
+      // it in the field; the section's runs between quotes are copied in,
+      // and scanning resumes after its closing quote
+      field = "";
+      for (;;) {
+        end = nextDelimiter(text, pos);
+        const segment = text.slice(pos, end);
+        const quoteAt = segment.indexOf('"');
+        if (quoteAt === -1 || (field + segment.slice(0, quoteAt)).trim() !== "") {
+          field += segment;
+          break;
+        }
+        field = "";
+        pos += quoteAt + 1;
+        for (;;) {
+          const quote = text.indexOf('"', pos);
+          if (quote === -1) {
+            field += text.slice(pos);
+            pos = text.length;
+            break;
+          }
+          field += text.slice(pos, quote);
+          if (text[quote + 1] === '"') {
+            field += '"';
+            pos = quote + 2;
+          } else {
+            pos = quote + 1;
+            break;
+          }
+        }
+      }
+      field = field.trim();
+    }
+    record.push(field);
+
+    if (end >= text.length) {
+      endRecord();
+      break;
+    }
+    if (text[end] !== ",") {
+      if (text[end] === "\r" && text[end + 1] === "\n") end++;
+      endRecord();
+    }
+    pos = end + 1;
+  }
+
+  if (!seenHeader) {
+    throw new Error("CSV data is empty.");
+  }
+  return rows;
+}
+
+self.onmessage = (event) => {
+  try {
+    self.postMessage({ rows: parseCsv(event.data) });
+  } catch (err) {
+    self.postMessage({ error: err.message || String(err) });
+  }
+};
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import threading
 from typing import Optional
 
 
@@ -12,6 +13,9 @@ class DriveAPI:
             'policy_001.pdf': 'Max Reimbursement is $100.',
             'hr_policy_002.pdf': 'Standard Employee T&Cs.'
         }
+        # Bumped on every write to this store so callers caching search
+        # results can tell it may have changed
+        self.generation = 0
     
     def search_file(self, query: str) -> str | None:
         """
@@ -41,6 +45,7 @@ class DriveAPI:
             True if upload successful
         """
         self.store[filename] = content
+        self.generation += 1
         return True
 
 
@@ -66,6 +71,8 @@ class HRSystemAPI:
                 'balance': 1000.00
             }
         }
+        # Batched reports update balances from worker threads
+        self._balance_lock = threading.Lock()
     
     def get_profile(self, employee_id: str) -> dict | None:
         """
@@ -79,7 +86,7 @@ class HRSystemAPI:
         """
         return self.employees.get(employee_id)
     
-    def update_balance(self, employee_id: str, amount: float) -> bool:
+    def update_balance(self, employee_id: str, amount: float) -> float | None:
         """
         Update employee reimbursement balance (simulates issuing reimbursements).
         
@@ -90,12 +97,15 @@ class HRSystemAPI:
             amount: Amount to add to balance
             
         Returns:
-            True if balance updated successfully, False otherwise
+            The new balance if updated successfully, None otherwise
         """
-        if employee_id not in self.employees:
-            return False
+        profile = self.employees.get(employee_id)
+        if profile is None:
+            return None
         
         # Add the amount to the employee's balance
-        self.employees[employee_id]['balance'] += amount
-        return True
+        with self._balance_lock:
+            profile['balance'] += amount
+            new_balance = profile['balance']
+        return new_balance
 
@@ -103,8 +103,7 @@ class InputValidator:
             raise ValidationError("Employee ID cannot be empty")
         
         # Expected format: E followed by 3 digits (e.g., E420)
-        pattern = r"^E[0-9]{3}$"
-        if not re.match(pattern, employee_id):
+        if not _EMPLOYEE_ID_RE.match(employee_id):
             logger.warning(f"[Validation] Invalid employee ID format: {employee_id}")
             raise ValidationError(
                 f"Invalid employee ID format. Expected format: E### (e.g., E420)"
@@ -171,16 +170,16 @@ class InputValidator:
             )
         
         # Check for SQL injection patterns
-        for pattern in InputValidator.SQL_INJECTION_PATTERNS:
-            if re.search(pattern, value, re.IGNORECASE):
+        for pattern in _SQL_INJECTION_RES:
+            if pattern.search(value):
                 logger.warning(
                     f"[Security] Potential SQL injection in {field_name}: {value[:50]}"
                 )
                 raise ValidationError(f"{field_name} contains prohibited SQL patterns")
         
         # Check for command injection patterns
-        for pattern in InputValidator.COMMAND_INJECTION_PATTERNS:
-            if re.search(pattern, value):
+        for pattern in _COMMAND_INJECTION_RES:
+            if pattern.search(value):
                 logger.warning(
                     f"[Security] Potential command injection in {field_name}: {value[:50]}"
                 )
@@ -190,16 +189,16 @@ class InputValidator:
         
         # Check for XSS patterns (unless HTML is explicitly allowed)
         if not allow_html:
-            for pattern in InputValidator.XSS_PATTERNS:
-                if re.search(pattern, value, re.IGNORECASE):
+            for pattern in _XSS_RES:
+                if pattern.search(value):
                     logger.warning(
                         f"[Security] Potential XSS in {field_name}: {value[:50]}"
                     )
                     raise ValidationError(f"{field_name} contains prohibited HTML/script content")
         
         # Check for path traversal
-        for pattern in InputValidator.PATH_TRAVERSAL_PATTERNS:
-            if re.search(pattern, value):
+        for pattern in _PATH_TRAVERSAL_RES:
+            if pattern.search(value):
                 logger.warning(
                     f"[Security] Potential path traversal in {field_name}: {value[:50]}"
                 )
@@ -234,17 +233,33 @@ class InputValidator:
         
         elif context == SanitizationContext.LOG:
             # Remove control characters and limit length
-            sanitized = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', value_str)
+            sanitized = _LOG_CONTROL_CHARS_RE.sub('', value_str)
             return sanitized[:500]  # Limit log length
         
         elif context == SanitizationContext.SHELL:
             # Shell escaping - remove all special characters
-            return re.sub(r'[^a-zA-Z0-9_\- ]', '', value_str)
+            return _SHELL_UNSAFE_RE.sub('', value_str)
         
         else:
             return value_str
 
 
+# Compiled once at import; the string lists above stay the public definition.
+_EMPLOYEE_ID_RE = re.compile(r"^E[0-9]{3}$")
+_SQL_INJECTION_RES = tuple(
+    re.compile(p, re.IGNORECASE) for p in InputValidator.SQL_INJECTION_PATTERNS
+)
+_COMMAND_INJECTION_RES = tuple(
+    re.compile(p) for p in InputValidator.COMMAND_INJECTION_PATTERNS
+)
+_XSS_RES = tuple(re.compile(p, re.IGNORECASE) for p in InputValidator.XSS_PATTERNS)
+_PATH_TRAVERSAL_RES = tuple(
+    re.compile(p) for p in InputValidator.PATH_TRAVERSAL_PATTERNS
+)
+_LOG_CONTROL_CHARS_RE = re.compile(r'[\x00-\x1f\x7f-\x9f]')
+_SHELL_UNSAFE_RE = re.compile(r'[^a-zA-Z0-9_\- ]')
+
+
 class CommandWhitelistValidator:
     """
     Validates commands against whitelist to prevent dangerous operations.
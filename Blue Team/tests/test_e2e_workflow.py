@@ -14,6 +14,9 @@ Run as: pytest tests/test_e2e_workflow.py -v
 
 import os
 import sys
+import time
+import hashlib
+import json
 import pytest
 import tempfile
 import shutil
@@ -57,9 +60,10 @@ class TestE2EWorkflow:
     @classmethod
     def teardown_class(cls):
         """Cleanup test environment."""
-        # Clean up email database
-        if os.path.exists(EMAIL_DB_PATH):
-            os.remove(EMAIL_DB_PATH)
+        # Clean up email database (including WAL sidecar files)
+        for db_file in (EMAIL_DB_PATH, f"{EMAIL_DB_PATH}-wal", f"{EMAIL_DB_PATH}-shm"):
+            if os.path.exists(db_file):
+                os.remove(db_file)
         
         # Clean up mock drive
         if os.path.exists(MOCK_DRIVE_ROOT):
@@ -93,6 +97,8 @@ class TestWorkflowAHappyPath(TestE2EWorkflow):
         assert "file_id" in result, "No file_id returned"
         assert result["original_filename"] == "expense_policy.pdf"
         assert result["mime_type"] == "application/pdf"
+        assert result["sha256"] == hashlib.sha256(pdf_content).hexdigest(), "Content hash mismatch"
+        assert result["file_id"] == result["sha256"][:12], "file_id is not content-addressed"
         
         # Save file_id for next test
         self.__class__.policy_file_id = result["file_id"]
@@ -169,6 +175,30 @@ class TestWorkflowAHappyPath(TestE2EWorkflow):
         print(f"    To: {email['to_addr']}")
         print(f"    Subject: {email['subject']}")
     
+    def test_03b_send_email_batch(self):
+        """
+        Test: Store several emails in one transaction
+        Expected: Every email in the batch is persisted
+        """
+        print("\n[Test A3b] Sending email batch...")
+        
+        from agents.mcp_email_server import get_db_connection, store_emails
+        
+        rows = [
+            ("system@company.com", f"employee{i}@company.com", "Reminder", "Submit receipts.", "2025-11-23T08:00:00Z")
+            for i in range(3)
+        ]
+        store_emails(rows)
+        
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT to_addr FROM emails WHERE subject = ? ORDER BY id", ("Reminder",))
+            recipients = [row["to_addr"] for row in cursor.fetchall()]
+        
+        assert recipients == [row[1] for row in rows]
+        
+        print(f"  ✅ SUCCESS - {len(recipients)} emails stored")
+    
     def test_04_verify_file_in_mock_drive(self):
         """
         Test: Verify uploaded file exists in mock_drive
@@ -192,6 +222,28 @@ class TestWorkflowAHappyPath(TestE2EWorkflow):
             print(f"    Content preview: {read_result['content'][:100]}...")
         else:
             print("  ⚠️  WARNING - No policy_file_id from previous test")
+    
+    def test_04b_upload_large_file(self):
+        """
+        Test: Upload a file large enough to take the direct-write path
+        Expected: Stored bytes match the upload exactly (no alignment padding)
+        """
+        print("\n[Test A4b] Uploading large expense report...")
+        
+        pdf_content = b"%PDF-1.4\n" + b"Receipt: $42.00 lunch\n" * 60000
+        
+        result = upload_file(
+            filename="expense_report.pdf",
+            file_content=pdf_content,
+            mime_type="application/pdf"
+        )
+        
+        assert result["status"] == "success", f"Upload failed: {result.get('message')}"
+        
+        with open(os.path.join(MOCK_DRIVE_ROOT, result["filename"]), "rb") as f:
+            assert f.read() == pdf_content, "Stored file differs from upload"
+        
+        print(f"  ✅ SUCCESS - {result['size_bytes']} bytes stored intact")
 
 
 class TestWorkflowBBlueTeamDefense(TestE2EWorkflow):
@@ -304,6 +356,19 @@ class TestWorkflowBBlueTeamDefense(TestE2EWorkflow):
         
         print(f"  ✅ DEFENSE SUCCESSFUL - Email without domain rejected")
     
+    def test_09b_reject_email_with_trailing_newline(self):
+        """
+        Test: Attempt to send email to an address with a trailing newline
+        Expected: Email validation rejects (header injection vector)
+        """
+        print("\n[Test B5b] ATTACK: Sending email to 'user@company.com\\n'...")
+        
+        is_valid = validate_email("user@company.com\n")
+        
+        assert is_valid is False, "Email with trailing newline was accepted!"
+        
+        print(f"  ✅ DEFENSE SUCCESSFUL - Trailing newline rejected")
+    
     def test_10_sanitize_html_in_email(self):
         """
         Test: Send email with HTML/XSS attempt
@@ -414,6 +479,359 @@ class TestMAESTROCompliance:
             assert details["Status"] == "✅ VERIFIED", f"{control_name} not verified"
 
 
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    """Agent with its event log under a temporary directory."""
+    monkeypatch.setenv("MCP_SIG_SECRET", os.getenv("MCP_SIG_SECRET", "test-secret"))
+    monkeypatch.chdir(tmp_path)
+    agent_module = pytest.importorskip("app.agent")
+    return agent_module.Agent()
+
+
+class TestExpenseBatchRows:
+    """Batched expense rows sent as one /tasks request (Agent._handle_rows)."""
+    
+    def test_13_batch_rows_run_under_batch_task(self, agent, monkeypatch):
+        """
+        Test: A row carrying its own 'task' (e.g. an admin-only upload)
+        Expected: Every row is handled under the batch task, which is the
+        only one /tasks authorizes and audits
+        """
+        print("\n[Test 13] Batch rows cannot bring their own task...")
+        
+        calls = []
+        monkeypatch.setattr(
+            agent, "_run_task",
+            lambda task, data: calls.append((task, data)) or {'status': 'completed'}
+        )
+        rows = [
+            {'task': 'Upload policy_001.pdf with new limits', 'employee_id': 'E420', 'amount': 10.0},
+            {'employee_id': 'E421', 'amount': 20.0, 'request_content': 'Taxi'}
+        ]
+        result = agent._handle_rows(
+            "Submit batch expense reimbursements", {'session_id': 's1', 'rows': rows}, rows
+        )
+        
+        assert result['status'] == 'completed'
+        assert [task for task, _ in calls] == ["Submit batch expense reimbursements"] * 2
+        assert all('task' not in data and 'rows' not in data for _, data in calls)
+        assert all(data['session_id'] == 's1' for _, data in calls)
+        assert calls[1][1]['request_content'] == 'Taxi'
+        
+        print("  ✅ SUCCESS - Per-row task ignored")
+    
+    def test_14_batch_rows_fail_independently(self, agent):
+        """
+        Test: A batch mixing a valid row with an unknown employee, a
+        non-object row, a row whose amount is null and a row over the
+        policy limit
+        Expected: Each row gets its own outcome; only the approved expense
+        counts as a success, and failures do not stop the rest
+        """
+        print("\n[Test 14] Failing rows do not stop the batch...")
+        
+        rows = [
+            {'employee_id': 'E420', 'amount': 20.0, 'transaction_id': 't1'},
+            {'employee_id': 'E999', 'amount': 20.0, 'transaction_id': 't2'},
+            'not a row',
+            {'employee_id': 'E420', 'amount': None, 'transaction_id': 't4'},
+            {'employee_id': 'E420', 'amount': 150.0, 'transaction_id': 't5'}
+        ]
+        result = agent.handle_task("Submit batch expense reimbursements", {'rows': rows})
+        
+        assert result['row_count'] == 5
+        assert result['succeeded'] == 1
+        assert [r['ok'] for r in result['rows']] == [True, False, False, False, False]
+        assert [r['transaction_id'] for r in result['rows']] == ['t1', 't2', None, 't4', 't5']
+        assert result['rows'][0]['result']['expense_result']['decision'] == 'Approved'
+        assert result['rows'][1]['result']['status'] == 'denied'
+        assert result['rows'][3]['result']['status'] == 'error'
+        assert result['rows'][4]['result']['expense_result']['decision'] == 'Denied'
+        
+        print("  ✅ SUCCESS - 1 of 5 rows succeeded")
+    
+    def test_15_batch_rows_limit(self, agent):
+        """
+        Test: More than MAX_TASK_ROWS rows in one task
+        Expected: The whole batch is denied before any row runs
+        """
+        print("\n[Test 15] Oversized batch...")
+        
+        rows = [{'employee_id': 'E420', 'amount': 1.0}] * (agent.MAX_TASK_ROWS + 1)
+        result = agent.handle_task("Submit batch expense reimbursements", {'rows': rows})
+        
+        assert result['status'] == 'denied'
+        assert agent.hr_api.get_profile('E420')['balance'] == 500.00
+        
+        print(f"  ✅ SUCCESS - Batch over {agent.MAX_TASK_ROWS} rows denied")
+
+
+class TestEventBatching:
+    """Buffered events.jsonl writes (_EventBatcher)."""
+    
+    def test_16_batched_events_keep_order(self, agent):
+        """
+        Test: Events queued below EVENT_BATCH_SIZE, then flushed
+        Expected: One append writes them all, in the order they were queued
+        """
+        print("\n[Test 16] Batched events keep their order...")
+        
+        for i in range(5):
+            agent._write_event({'action': 'test_event', 'seq': i})
+        agent._events.flush()
+        
+        with open(agent.events_log, encoding='utf-8') as f:
+            seqs = [json.loads(line)['seq'] for line in f]
+        assert seqs == list(range(5))
+        
+        print("  ✅ SUCCESS - 5 events written in order")
+    
+    def test_17_handle_task_flushes_events(self, agent):
+        """
+        Test: A denied task, with the log read as soon as handle_task returns
+        Expected: The request's events are already in events.jsonl, ahead of
+        anything the caller appends next
+        """
+        print("\n[Test 17] handle_task flushes its events...")
+        
+        result = agent.handle_task("Submit expense reimbursement", {'employee_id': 'E999', 'amount': 5.0})
+        with open(agent.events_log, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'action': 'caller_event'}) + "\n")
+        
+        with open(agent.events_log, encoding='utf-8') as f:
+            actions = [json.loads(line)['action'] for line in f]
+        assert result['status'] == 'denied'
+        assert actions == ['SECURITY_ALERT_INVALID_EMPLOYEE_ID', 'caller_event']
+        
+        print("  ✅ SUCCESS - Agent event written before the caller's")
+    
+    def test_18_events_accept_large_integers(self, agent):
+        """
+        Test: An expense whose amount is an integer beyond 64 bits
+        Expected: Its events are written like any other (no encoder error)
+        """
+        print("\n[Test 18] Event with a very large amount...")
+        
+        agent.handle_task("Submit expense reimbursement", {'employee_id': 'E420', 'amount': 10**20})
+        
+        with open(agent.events_log, encoding='utf-8') as f:
+            events = [json.loads(line) for line in f]
+        assert events[0]['action'] == 'ANOMALY_HIGH_VALUE_REQUEST'
+        assert events[0]['amount'] == 10**20
+        
+        print(f"  ✅ SUCCESS - {len(events)} event(s) written")
+
+
+class TestCsvDocument:
+    """The csv_document sent with a batched CSV upload (Agent._handle_rows)."""
+    
+    def test_19_client_hash_logged(self, agent):
+        """
+        Test: A csv_document carrying only the client's size and SHA-256
+        Expected: The metadata is logged as unverified and the rows still run
+        """
+        print("\n[Test 19] Client-hashed CSV document...")
+        
+        csv_text = "TransactionID,EmployeeID,Amount\nt1,E420,20.0"
+        sha256 = hashlib.sha256(csv_text.encode('utf-8')).hexdigest()
+        rows = [{'employee_id': 'E420', 'amount': 20.0, 'transaction_id': 't1'}]
+        result = agent.handle_task("Submit batch expense reimbursements", {
+            'rows': rows,
+            'csv_document': {'doc_id': 'csv-1', 'size': len(csv_text), 'sha256': sha256}
+        })
+        
+        assert result['succeeded'] == 1
+        assert result['document'] == {
+            'doc_id': 'csv-1', 'size': len(csv_text), 'sha256': sha256, 'verified': False
+        }
+        
+        print("  ✅ SUCCESS - Document metadata logged")
+    
+    def test_20_csv_content_checked(self, agent):
+        """
+        Test: A csv_document whose content is over MAX_CSV_DOCUMENT_CHARS, and
+        one whose content does not match the sha256 sent with it
+        Expected: Both batches are denied before any row runs
+        """
+        print("\n[Test 20] CSV document content limits...")
+        
+        rows = [{'employee_id': 'E420', 'amount': 20.0}]
+        oversized = {'content': 'x' * (agent.MAX_CSV_DOCUMENT_CHARS + 1)}
+        tampered = {'content': 'a,b', 'sha256': hashlib.sha256(b'a,c').hexdigest()}
+        
+        for document in (oversized, tampered):
+            result = agent.handle_task(
+                "Submit batch expense reimbursements", {'rows': rows, 'csv_document': document}
+            )
+            assert result['status'] == 'denied'
+        assert agent.hr_api.get_profile('E420')['balance'] == 500.00
+        
+        print("  ✅ SUCCESS - Oversized and mismatched documents denied")
+
+
+class TestExpenseBatchEndpoint:
+    """Request model for /expense/batch."""
+    
+    def test_21_batch_report_limit(self, monkeypatch):
+        """
+        Test: An /expense/batch request with more than MAX_BATCH_REPORTS reports
+        Expected: The request model rejects it before any report is processed
+        """
+        print("\n[Test 21] Oversized expense batch...")
+        
+        for name in ("AGENT_SIG_SECRET", "MCP_SIG_SECRET", "ADMIN_SECRET_KEY"):
+            monkeypatch.setenv(name, os.getenv(name, "test-secret"))
+        pytest.importorskip("fastapi")
+        main = pytest.importorskip("app.main")
+        from pydantic import ValidationError
+        
+        report = {'employee_id': 'E420', 'amount': 10.0}
+        assert len(main.ExpenseBatchRequest(reports=[report] * main.MAX_BATCH_REPORTS).reports) == main.MAX_BATCH_REPORTS
+        with pytest.raises(ValidationError):
+            main.ExpenseBatchRequest(reports=[report] * (main.MAX_BATCH_REPORTS + 1))
+        
+        print(f"  ✅ SUCCESS - Batch over {main.MAX_BATCH_REPORTS} reports rejected")
+
+
+class TestMcpDelivery:
+    """Fire-and-forget MCP sends from the expense route."""
+    
+    def test_22_mcp_down_uses_fallback(self, agent, monkeypatch):
+        """
+        Test: An expense task while nothing listens at MCP_URL
+        Expected: The refused send is seen within MCP_RESULT_WAIT, so the
+        task records the direct-call fallback instead of 'pending'
+        """
+        print("\n[Test 22] MCP server down...")
+        
+        monkeypatch.setattr(sys.modules[type(agent).__module__], "MCP_URL", "http://127.0.0.1:9")
+        result = agent.handle_task("Submit expense reimbursement", {'employee_id': 'E420', 'amount': 20.0})
+        
+        assert result['decision'] == 'Approved'
+        assert 'mcp_metadata' not in result['expense_result']
+        
+        print("  ✅ SUCCESS - Direct-call fallback recorded")
+    
+    def test_23_late_mcp_failure_logged(self, agent):
+        """
+        Test: A background MCP send that fails after its task returned
+        Expected: An mcp_delivery_failed event is written for the task
+        """
+        print("\n[Test 23] Late MCP failure...")
+        
+        from concurrent.futures import Future
+        future = Future()
+        future.set_result({'status': 'error', 'message': 'MCP server returned 503'})
+        agent._log_late_mcp_failure("Submit expense reimbursement", "t-1", future)
+        agent._events.flush()
+        
+        with open(agent.events_log, encoding='utf-8') as f:
+            events = [json.loads(line) for line in f]
+        assert events[-1]['action'] == 'mcp_delivery_failed'
+        assert events[-1]['task_id'] == 't-1'
+        
+        print("  ✅ SUCCESS - Failed delivery logged")
+
+
+class TestTaskDenyList:
+    """Deny-list checks on the task before planning."""
+    
+    def test_24_task_checked_once(self, agent, monkeypatch):
+        """
+        Test: An allowed expense task run through handle_task
+        Expected: The deny-list regex scans the task text only once
+        """
+        print("\n[Test 24] Task deny-list check runs once...")
+        
+        task = "Submit expense reimbursement"
+        scanned = []
+        deny_re = agent._deny_re
+        
+        class CountingPattern:
+            def search(self, text):
+                scanned.append(text)
+                return deny_re.search(text)
+        
+        monkeypatch.setattr(agent, "_deny_re", CountingPattern())
+        agent.handle_task(task, {'employee_id': 'E420', 'amount': 20.0})
+        
+        assert scanned.count(task) == 1
+        
+        print("  ✅ SUCCESS - Task scanned once")
+
+
+class TestPolicyCache:
+    """Expense policy cached per DriveAPI (ExpenseAgent._get_policy)."""
+    
+    def test_25_policy_cached_per_drive(self, agent):
+        """
+        Test: Two agents, one of whose drives gets a stricter policy upload
+        after both policies are cached
+        Expected: Each agent applies the policy of its own drive
+        """
+        print("\n[Test 25] Policy cache is per drive...")
+        
+        other = type(agent)()
+        for a in (agent, other):
+            assert a.expense_agent.process_report('E420', 80.0, 'Taxi')['decision'] == 'Approved'
+        
+        other.drive_api.upload_file('policy_001.pdf', 'Max Reimbursement is $50.')
+        
+        assert other.expense_agent.process_report('E420', 80.0, 'Taxi')['decision'] == 'Denied'
+        assert agent.expense_agent.process_report('E420', 80.0, 'Taxi')['decision'] == 'Approved'
+        
+        print("  ✅ SUCCESS - Each drive's policy applied")
+
+
+class TestDriveSearchText(TestE2EWorkflow):
+    """Drive search on non-ASCII text (search_files)."""
+    
+    def test_26_non_ascii_search(self):
+        """
+        Test: Search with a non-ASCII query in a different case from the
+        file, whose text is multibyte UTF-8
+        Expected: The file is found, and its excerpt is the first 200
+        characters, not 200 bytes
+        """
+        print("\n[Test 26] Non-ASCII search and excerpt...")
+        
+        text = "Résumé policy: " + "é" * 300
+        upload = upload_file(filename="notes.txt", file_content=text.encode('utf-8'), mime_type="text/plain")
+        assert upload["status"] == "success"
+        
+        result = search_files(query="RÉSUMÉ")
+        hits = [r for r in result["results"] if r["file_id"] == upload["file_id"]]
+        
+        assert len(hits) == 1
+        assert hits[0]["excerpt"] == text[:200] + "..."
+        
+        print("  ✅ SUCCESS - Case-insensitive match, 200-character excerpt")
+
+
+class TestNonceCache:
+    """MCP server replay protection (NonceCache)."""
+    
+    def test_27_nonce_expiry_follows_request_timestamp(self, monkeypatch):
+        """
+        Test: A nonce replayed while its signed timestamp is still in the
+        window, and a request signed longer ago than the window
+        Expected: Both are rejected; a fresh nonce is accepted
+        """
+        print("\n[Test 27] Nonce expiry follows the request timestamp...")
+        
+        monkeypatch.setenv("MCP_SIG_SECRET", os.getenv("MCP_SIG_SECRET", "test-secret"))
+        mcp_server = pytest.importorskip("app.mcp_server")
+        cache = mcp_server.NonceCache(window_seconds=300)
+        now = time.time()
+        
+        assert cache.check_and_add("n1", now - 200)
+        assert not cache.check_and_add("n1", now - 200)
+        assert not cache.check_and_add("n2", now - 301)
+        assert cache.check_and_add("n3", now)
+        
+        print("  ✅ SUCCESS - Replayed and stale nonces rejected")
+
 if __name__ == "__main__":
     # Run tests with verbose output
     pytest.main([__file__, "-v", "-s", "--tb=short"])